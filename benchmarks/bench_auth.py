@@ -0,0 +1,58 @@
+"""
+Time authenticating a request with the JWT cookie, with dj-rest-auth's
+JWTCookieAuthentication and with CachedJWTCookieAuthentication from
+drf_api/authentication.py, once warmed up and on a miss.
+
+    python -m benchmarks.bench_auth [--repeat 2000]
+
+Against SQLite the user query is cheap, so point DATABASE_URL at the
+hosted database to see what the saved round trip is worth.
+"""
+import argparse
+
+from benchmarks.utils import measure, report, setup_django, test_database
+
+setup_django()
+
+from dj_rest_auth.jwt_auth import JWTCookieAuthentication  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+from drf_api.authentication import (  # noqa: E402
+    CachedJWTCookieAuthentication, token_cache,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    with test_database() as connection:
+        user = User.objects.create_user(username='adam', password='pass')
+        request = APIRequestFactory().get('/api/posts/')
+        request.COOKIES[settings.JWT_AUTH_COOKIE] = str(AccessToken.for_user(user))
+
+        def authenticate(authentication_class, clear=False):
+            def run():
+                if clear:
+                    token_cache.clear()
+                authentication_class().authenticate(request)
+            return run
+
+        print(f'{connection.vendor}, {args.repeat} requests')
+        report('JWTCookieAuthentication', measure(
+            authenticate(JWTCookieAuthentication), repeat=args.repeat
+        ))
+        report('cached, miss', measure(
+            authenticate(CachedJWTCookieAuthentication, clear=True),
+            repeat=args.repeat,
+        ))
+        report('cached, hit', measure(
+            authenticate(CachedJWTCookieAuthentication), repeat=args.repeat
+        ))
+
+
+if __name__ == '__main__':
+    main()
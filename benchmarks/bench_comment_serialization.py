@@ -0,0 +1,71 @@
+"""
+Time serializing a page of comments with django.contrib.humanize's
+naturaltime against the memoized one in drf_api/humanize.py, and with
+?timestamps=iso, which leaves humanizing the times to the client.
+
+    python -m benchmarks.bench_comment_serialization [--comments 100]
+
+The comments are spread over the last 30 days, as on a long thread.
+"""
+import argparse
+import random
+from datetime import timedelta
+from unittest import mock
+
+from benchmarks.utils import (
+    measure, report, setup_django, test_database, without_auto_now,
+)
+
+setup_django()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.contrib.humanize.templatetags import humanize  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from comments.models import Comment  # noqa: E402
+from comments.serializers import CommentSerializer  # noqa: E402
+from posts.models import Post  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--comments', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    with test_database():
+        owner = User.objects.create_user(username='adam', password='pass')
+        post = Post.objects.create(owner=owner, title='a post')
+        rng = random.Random(0)
+        now = timezone.now()
+        with without_auto_now(Comment):
+            for i in range(args.comments):
+                created_at = now - timedelta(seconds=rng.randrange(30 * 86400))
+                Comment.objects.create(
+                    owner=owner, post=post, content=f'comment {i}',
+                    created_at=created_at, updated_at=created_at,
+                )
+        comments = list(Comment.objects.select_related('owner__profile'))
+        factory = APIRequestFactory()
+
+        def serialize(query=''):
+            request = Request(factory.get(f'/api/comments/{query}'))
+            return lambda: CommentSerializer(
+                comments, many=True, context={'request': request}
+            ).data
+
+        print(f'{len(comments)} comments per page')
+        with mock.patch(
+            'comments.serializers.naturaltime', humanize.naturaltime
+        ):
+            report('humanize.naturaltime', measure(serialize(), repeat=args.repeat))
+        report('memoized naturaltime', measure(serialize(), repeat=args.repeat))
+        report(
+            '?timestamps=iso',
+            measure(serialize('?timestamps=iso'), repeat=args.repeat),
+        )
+
+
+if __name__ == '__main__':
+    main()
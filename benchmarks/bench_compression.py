@@ -0,0 +1,82 @@
+"""
+Size and CPU time of compressing realistic /api/posts/ and
+/api/comments/ pages, gzip and brotli at the levels drf_api/compression.py
+uses on the fly and for precompressed responses, and the cost of
+serving a precompressed body from the cache instead.
+
+    python -m benchmarks.bench_compression [--repeat 200]
+"""
+import argparse
+import random
+
+from benchmarks.utils import measure, report, setup_django, test_database
+
+setup_django()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.test import Client  # noqa: E402
+from comments.models import Comment  # noqa: E402
+from drf_api import compression  # noqa: E402
+from posts.models import Post  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    if compression.brotli is None:
+        print('Brotli is not installed, only gzip is measured')
+
+    with test_database():
+        owners = [
+            User.objects.create_user(username=f'user{i}', password='pass')
+            for i in range(5)
+        ]
+        # varied text, as repeating one sentence compresses unrealistically well
+        rng = random.Random(0)
+        words = __doc__.split()
+
+        def text(count):
+            return ' '.join(rng.choice(words) for _ in range(count))
+
+        post = None
+        for i in range(20):
+            post = Post.objects.create(
+                owner=owners[i % 5], title=text(5), content=text(40),
+            )
+        for i in range(20):
+            Comment.objects.create(
+                owner=owners[i % 5], post=post, content=text(15)
+            )
+        client = Client()
+        pages = {
+            '/api/posts/': client.get('/api/posts/').content,
+            '/api/comments/': client.get(f'/api/comments/?post={post.id}').content,
+        }
+
+        for path, content in pages.items():
+            print(f'{path}, {len(content)} bytes')
+            for encoding in compression.ENCODINGS:
+                # gzip uses one level for both
+                for cached in (False, True) if encoding == 'br' else (False,):
+                    size = len(compression.compress(content, encoding, cached))
+                    label = (
+                        f'  {encoding} {"precompressed" if cached else "on the fly"}'
+                        f' {size} bytes ({size / len(content):.0%})'
+                    )
+                    report(label, measure(
+                        lambda: compression.compress(content, encoding, cached),
+                        repeat=args.repeat,
+                    ))
+                cache.clear()
+                compression.compress_cached(content, encoding)
+                report(f'  {encoding} cache hit', measure(
+                    lambda: compression.compress_cached(content, encoding),
+                    repeat=args.repeat,
+                ))
+
+
+if __name__ == '__main__':
+    main()
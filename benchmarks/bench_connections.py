@@ -0,0 +1,74 @@
+"""
+Measure /api/posts/ latency with a new database connection per request,
+with persistent connections (CONN_MAX_AGE), with persistent connections
+plus health checks, and with the psycopg2 pool.
+
+    DATABASE_URL=postgres://... python -m benchmarks.bench_connections
+
+The difference comes from connection setup, i.e. TCP, TLS and
+authentication, so point DATABASE_URL at the hosted database (a test
+database is created and dropped next to the real one). The pool needs
+PostgreSQL. Against SQLite only the first two modes run, and they
+time the same thing, as the in-memory test database is never closed.
+"""
+import argparse
+
+from benchmarks.utils import measure, report, setup_django, test_database
+
+setup_django()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import close_old_connections  # noqa: E402
+from django.test import Client  # noqa: E402
+from drf_api.db.postgresql.base import close_pools  # noqa: E402
+from posts.models import Post  # noqa: E402
+
+MODES = {
+    'new connection per request': {'CONN_MAX_AGE': 0},
+    'persistent (CONN_MAX_AGE=60)': {'CONN_MAX_AGE': 60},
+    'persistent + health checks': {
+        'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True,
+    },
+    'pooled (max_size=4)': {
+        'CONN_MAX_AGE': 0, 'OPTIONS': {'pool': {'max_size': 4}},
+    },
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    with test_database() as connection:
+        owner = User.objects.create_user(username='adam', password='pass')
+        for i in range(10):
+            Post.objects.create(owner=owner, title=f'post {i}')
+        client = Client()
+
+        def request():
+            # what the request_started and request_finished signals do,
+            # the test client disconnects them
+            close_old_connections()
+            client.get('/api/posts/')
+            close_old_connections()
+
+        original = dict(connection.settings_dict)
+        custom_backend = connection.settings_dict['ENGINE'] == 'drf_api.db.postgresql'
+        print(f'{connection.vendor}, {args.repeat} requests per mode')
+
+        for label, settings in MODES.items():
+            if ('OPTIONS' in settings or 'CONN_HEALTH_CHECKS' in settings) \
+                    and not custom_backend:
+                print(f'{label:<48} skipped, needs drf_api.db.postgresql')
+                continue
+            connection.close()
+            connection.settings_dict.update(original, **settings)
+            report(label, measure(request, repeat=args.repeat))
+        connection.close()
+        close_pools()
+        connection.settings_dict.update(original)
+
+
+if __name__ == '__main__':
+    main()
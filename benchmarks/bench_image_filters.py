@@ -0,0 +1,110 @@
+"""
+Time the image_filter kernels of posts/image_filters.py on a photo
+sized like the 'full' variant, against a per-pixel Python reference
+and, when NumPy is installed, an equivalent float NumPy kernel.
+
+    python -m benchmarks.bench_image_filters [--size 1600x1200] [--repeat 20]
+"""
+import argparse
+import random
+
+from benchmarks.utils import measure, report, setup_django
+
+setup_django()
+
+from PIL import Image  # noqa: E402
+from posts.image_filters import FILTERS  # noqa: E402
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def sample_image(width, height, seed):
+    """
+    Random noise, so nothing about the content helps any kernel.
+    """
+    rng = random.Random(seed)
+    return Image.frombytes(
+        'RGB', (width, height), rng.randbytes(width * height * 3)
+    )
+
+
+def python_kernel(image_filter):
+    table, matrix = image_filter.table, image_filter.matrix
+
+    def apply(image):
+        pixels = []
+        for r, g, b in image.getdata():
+            if table:
+                r, g, b = table[r], table[256 + g], table[512 + b]
+            if matrix:
+                r, g, b = (
+                    min(255, max(0, round(
+                        matrix[i] * r + matrix[i + 1] * g
+                        + matrix[i + 2] * b + matrix[i + 3]
+                    )))
+                    for i in (0, 4, 8)
+                )
+            pixels.append((r, g, b))
+        output = Image.new('RGB', image.size)
+        output.putdata(pixels)
+        return output
+    return apply
+
+
+def numpy_kernel(image_filter):
+    table = matrix = None
+    if image_filter.table:
+        table = numpy.array(image_filter.table, dtype=numpy.uint8).reshape(3, 256)
+    if image_filter.matrix:
+        matrix = numpy.array(image_filter.matrix, dtype=numpy.float32).reshape(3, 4)
+
+    def apply(image):
+        pixels = numpy.asarray(image)
+        if table is not None:
+            pixels = numpy.stack(
+                [table[channel][pixels[..., channel]] for channel in range(3)],
+                axis=-1,
+            )
+        if matrix is not None:
+            pixels = pixels.astype(numpy.float32) @ matrix[:, :3].T + matrix[:, 3]
+            pixels = numpy.clip(pixels + 0.5, 0, 255).astype(numpy.uint8)
+        return Image.fromarray(pixels, 'RGB')
+    return apply
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', default='1600x1200')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    width, height = (int(value) for value in args.size.split('x'))
+    image = sample_image(width, height, args.seed)
+    # the Python reference is far too slow for a full sized image
+    small = image.resize((width // 8, height // 8))
+    scale = (width * height) / (small.width * small.height)
+    megapixels = width * height / 1e6
+
+    print(f'{width}x{height} ({megapixels:.2f} Mpx), NumPy '
+          f'{numpy.__version__ if numpy else "not installed"}')
+    for name, image_filter in FILTERS.items():
+        print(f'\n{name}')
+        timings = measure(lambda: image_filter.apply(image), repeat=args.repeat)
+        report('  pillow (lookup table + colour matrix)', timings)
+        if numpy:
+            kernel = numpy_kernel(image_filter)
+            report('  numpy (float32)', measure(
+                lambda: kernel(image), repeat=args.repeat
+            ))
+        kernel = python_kernel(image_filter)
+        timings = measure(lambda: kernel(small), repeat=3, warmup=1)
+        report('  python per pixel (extrapolated)', [
+            t * scale for t in timings
+        ])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Seed about a million rows and compare the query plans and timings of the
+hot post, comment, like and follower lookups with and without the
+composite indexes.
+
+    python -m benchmarks.bench_indexes [--scale 0.1]
+"""
+import argparse
+import random
+from datetime import timedelta
+
+from benchmarks.utils import (
+    measure, report, setup_django, test_database, without_auto_now,
+)
+
+setup_django()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from comments.models import Comment  # noqa: E402
+from followers.models import Follower  # noqa: E402
+from likes.models import Like  # noqa: E402
+from posts.models import Post  # noqa: E402
+from profiles.models import Profile  # noqa: E402
+
+SIZES = {
+    'users': 10_000,
+    'posts': 250_000,
+    'comments': 400_000,
+    'likes': 250_000,
+    'followers': 100_000,
+}
+INDEXED = [Post, Comment, Like, Follower]
+
+
+def bulk(model, rows, batch_size=5000):
+    for start in range(0, len(rows), batch_size):
+        model.objects.bulk_create(rows[start:start + batch_size])
+
+
+def unique_pairs(count, left, right, rng):
+    pairs = set()
+    while len(pairs) < count:
+        owner, other = rng.choice(left), rng.choice(right)
+        if owner != other:
+            pairs.add((owner, other))
+    return pairs
+
+
+def seed(scale, rng):
+    sizes = {name: max(10, int(size * scale)) for name, size in SIZES.items()}
+    now = timezone.now()
+
+    def moment():
+        return now - timedelta(seconds=rng.randrange(365 * 24 * 3600))
+
+    with without_auto_now(Post, Comment, Like, Follower, Profile):
+        bulk(User, [
+            User(username=f'user{i}', password='!')
+            for i in range(sizes['users'])
+        ])
+        user_ids = list(User.objects.values_list('id', flat=True))
+        bulk(Profile, [
+            Profile(owner_id=user_id, created_at=now, updated_at=now)
+            for user_id in user_ids
+        ])
+        bulk(Post, [
+            Post(owner_id=rng.choice(user_ids), title=f'post {i}',
+                 created_at=created, updated_at=created)
+            for i, created in ((i, moment()) for i in range(sizes['posts']))
+        ])
+        post_ids = list(Post.objects.values_list('id', flat=True))
+        bulk(Comment, [
+            Comment(owner_id=rng.choice(user_ids), post_id=rng.choice(post_ids),
+                    content='comment', created_at=created, updated_at=created)
+            for created in (moment() for _ in range(sizes['comments']))
+        ])
+        bulk(Like, [
+            Like(owner_id=owner, post_id=post, created_at=moment())
+            for owner, post in unique_pairs(
+                sizes['likes'], user_ids, post_ids, rng
+            )
+        ])
+        bulk(Follower, [
+            Follower(owner_id=owner, followed_id=followed, created_at=moment())
+            for owner, followed in unique_pairs(
+                sizes['followers'], user_ids, user_ids, rng
+            )
+        ])
+    return sizes, user_ids, post_ids
+
+
+def hot_queries(user_ids, post_ids, rng):
+    user, other = rng.sample(user_ids, 2)
+    post = rng.choice(post_ids)
+    return {
+        'feed, newest first': Post.objects.order_by('-created_at')[:10],
+        'posts by owner__profile, newest first': Post.objects.filter(
+            owner__profile=Profile.objects.get(owner_id=user).id
+        ).order_by('-created_at')[:10],
+        'comments on a post, newest first': Comment.objects.filter(
+            post=post
+        ).order_by('-created_at')[:10],
+        'like by (owner, post)': Like.objects.filter(owner=user, post=post),
+        'posts a user liked, newest like first': Like.objects.filter(
+            owner=user
+        ).order_by('-created_at')[:10],
+        'follow by (owner, followed)': Follower.objects.filter(
+            owner=user, followed=other
+        ),
+        'followers of a user, newest first': Follower.objects.filter(
+            followed=user
+        ).order_by('-created_at')[:10],
+    }
+
+
+def run(label, queries):
+    print(f'\n=== {label}')
+    for name, queryset in queries.items():
+        print(f'\n{name}\n  ' + queryset.explain().replace('\n', '\n  '))
+        report(name, measure(lambda: list(queryset.all()), repeat=30))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with test_database() as connection:
+        sizes, user_ids, post_ids = seed(args.scale, rng)
+        print(f'seeded {sum(sizes.values()):,} rows: {sizes}')
+        queries = hot_queries(user_ids, post_ids, rng)
+
+        with connection.schema_editor() as editor:
+            for model in INDEXED:
+                for index in model._meta.indexes:
+                    editor.remove_index(model, index)
+        run('without composite indexes', queries)
+
+        with connection.schema_editor() as editor:
+            for model in INDEXED:
+                for index in model._meta.indexes:
+                    editor.add_index(model, index)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        run('with composite indexes', queries)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Time rendering realistic /api/posts/ and /api/comments/ pages with DRF's
+stdlib JSONRenderer and with the orjson backed one in
+drf_api/renderers.py, checking that both give the same bytes.
+
+    python -m benchmarks.bench_json [--repeat 2000]
+"""
+import argparse
+
+from benchmarks.utils import measure, report, setup_django, test_database
+
+setup_django()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.test import Client  # noqa: E402
+from rest_framework import renderers  # noqa: E402
+from comments.models import Comment  # noqa: E402
+from drf_api import renderers as api_renderers  # noqa: E402
+from posts.models import Post  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    if api_renderers.orjson is None:
+        print('orjson is not installed, drf_api.renderers uses the stdlib')
+
+    with test_database():
+        owners = [
+            User.objects.create_user(username=f'user{i}', password='pass')
+            for i in range(5)
+        ]
+        post = None
+        for i in range(20):
+            post = Post.objects.create(
+                owner=owners[i % 5], title=f'Post number {i}',
+                content='Some text about the photo, a sentence or two long. ' * 3,
+            )
+        for i in range(20):
+            Comment.objects.create(
+                owner=owners[i % 5], post=post, content=f'Nice photo! ({i})'
+            )
+        client = Client()
+        client.login(username='user0', password='pass')
+        payloads = {
+            '/api/posts/': client.get('/api/posts/').data,
+            '/api/comments/': client.get(f'/api/comments/?post={post.id}').data,
+        }
+
+        for path, data in payloads.items():
+            stdlib = renderers.JSONRenderer()
+            fast = api_renderers.JSONRenderer()
+            assert stdlib.render(data) == fast.render(data)
+            print(f'{path}, {len(fast.render(data))} bytes')
+            report('  rest_framework JSONRenderer', measure(
+                lambda: stdlib.render(data), repeat=args.repeat
+            ))
+            report('  drf_api JSONRenderer', measure(
+                lambda: fast.render(data), repeat=args.repeat
+            ))
+
+
+if __name__ == '__main__':
+    main()
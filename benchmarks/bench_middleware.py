@@ -0,0 +1,68 @@
+"""
+Time GET /api/posts/ with JWT cookie authentication through Django's
+session, CSRF, auth and messages middleware, and through the stateless
+API routes of drf_api/middleware.py.
+
+    python -m benchmarks.bench_middleware [--repeat 500]
+
+The client also sends a session cookie, like a browser that is logged
+into the admin, which the stock middleware loads whenever something
+reads request.user or request.session.
+"""
+import argparse
+
+from benchmarks.utils import measure, report, setup_django, test_database
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+from posts.models import Post  # noqa: E402
+
+STOCK = {
+    'drf_api.middleware.SessionMiddleware':
+        'django.contrib.sessions.middleware.SessionMiddleware',
+    'drf_api.middleware.CsrfViewMiddleware':
+        'django.middleware.csrf.CsrfViewMiddleware',
+    'drf_api.middleware.AuthenticationMiddleware':
+        'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'drf_api.middleware.MessageMiddleware':
+        'django.contrib.messages.middleware.MessageMiddleware',
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    rest_framework = dict(settings.REST_FRAMEWORK, DEFAULT_AUTHENTICATION_CLASSES=[
+        'drf_api.authentication.CachedJWTCookieAuthentication',
+    ])
+    with test_database(), override_settings(REST_FRAMEWORK=rest_framework):
+        user = User.objects.create_user(username='adam', password='pass')
+        for i in range(10):
+            Post.objects.create(owner=user, title=f'post {i}')
+        token = str(AccessToken.for_user(user))
+
+        def get_posts():
+            # a new client per mode, as each loads the middleware once
+            client = Client()
+            client.login(username='adam', password='pass')
+            client.cookies[settings.JWT_AUTH_COOKIE] = token
+
+            def get():
+                assert client.get('/api/posts/').status_code == 200
+            return get
+
+        stock = [STOCK.get(path, path) for path in settings.MIDDLEWARE]
+        with override_settings(MIDDLEWARE=stock, STATELESS_API=False):
+            report('stock middleware', measure(get_posts(), repeat=args.repeat))
+        with override_settings(STATELESS_API=True):
+            report('stateless API routes', measure(get_posts(), repeat=args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Time loading and serializing a page of posts and of profiles with the
+model serializers against the .values() ones in drf_api/values.py,
+as PostList and ProfileList would for a logged in user.
+
+    python -m benchmarks.bench_values_serialization [--page 10]
+
+Both sides run the page's query, as reading model instances rather
+than rows is part of what the values() path saves.
+"""
+import argparse
+
+from benchmarks.utils import measure, report, setup_django, test_database
+
+setup_django()
+
+from django.contrib.auth.models import User  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+from followers.models import Follower  # noqa: E402
+from likes.models import Like  # noqa: E402
+from posts.models import Post  # noqa: E402
+from posts.serializers import PostSerializer, PostValuesSerializer  # noqa: E402
+from posts.views import annotate_like_id  # noqa: E402
+from profiles.models import Profile  # noqa: E402
+from profiles.serializers import (  # noqa: E402
+    ProfileSerializer, ProfileValuesSerializer,
+)
+from profiles.views import annotate_following_id  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--page', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    with test_database():
+        adam = User.objects.create_user(username='adam', password='pass')
+        for i in range(args.page):
+            user = User.objects.create_user(username=f'user{i}', password='pass')
+            post = Post.objects.create(
+                owner=user, title=f'post {i}', content='some content ' * 20
+            )
+            if i % 2:
+                Like.objects.create(owner=adam, post=post)
+                Follower.objects.create(owner=adam, followed=user)
+
+        request = Request(APIRequestFactory().get('/api/posts/'))
+        request.user = adam
+        context = {'request': request}
+        posts = annotate_like_id(
+            Post.objects.select_related('owner__profile'), adam
+        ).order_by('-created_at')[:args.page]
+        profiles = annotate_following_id(
+            Profile.objects.select_related('owner'), adam
+        ).order_by('-created_at')[:args.page]
+
+        def values(serializer_class, queryset):
+            def run():
+                serializer = serializer_class(context)
+                rows = queryset.values(*serializer.get_columns(queryset))
+                return serializer.serialize(rows)
+            return run
+
+        print(f'{args.page} rows per page')
+        report('PostSerializer', measure(
+            lambda: PostSerializer(posts.all(), many=True, context=context).data,
+            repeat=args.repeat,
+        ))
+        report('PostValuesSerializer', measure(
+            values(PostValuesSerializer, posts), repeat=args.repeat
+        ))
+        report('ProfileSerializer', measure(
+            lambda: ProfileSerializer(
+                profiles.all(), many=True, context=context
+            ).data,
+            repeat=args.repeat,
+        ))
+        report('ProfileValuesSerializer', measure(
+            values(ProfileValuesSerializer, profiles), repeat=args.repeat
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Compare the WSGI deployment (sync workers) with the ASGI one (uvicorn
+workers) under concurrent reads, at equal worker counts.
+
+For each mode this starts gunicorn with gunicorn.conf.py, as the Procfile
+does, and fires --requests GETs at the post, profile and comment lists
+from --concurrency client threads, reporting latencies and throughput.
+
+    python -m benchmarks.load_test [--workers 2] [--concurrency 32]
+
+The servers use a fresh SQLite database seeded by the script. Pass
+--database-url to use a scratch Postgres database instead; it's
+migrated and seeded, so never point it at real data.
+"""
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.utils import BASE_DIR, report, setup_django
+
+PATHS = ['/api/posts/', '/api/profiles/', '/api/comments/?post=1']
+
+
+def seed(users, posts_per_user):
+    from django.contrib.auth.models import User
+    from comments.models import Comment
+    from posts.models import Post
+
+    if Post.objects.exists():
+        return
+    owners = [
+        User.objects.create_user(username=f'user{i}', password='pass')
+        for i in range(users)
+    ]
+    for owner in owners:
+        for i in range(posts_per_user):
+            post = Post.objects.create(owner=owner, title=f'post {i}')
+            for commenter in owners[:3]:
+                Comment.objects.create(owner=commenter, post=post, content='c')
+
+
+def start_server(mode, port, workers, env):
+    env = dict(env, WEB_CONCURRENCY=str(workers))
+    if mode == 'asgi':
+        env['ASGI'] = '1'
+    else:
+        env.pop('ASGI', None)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py',
+         '--bind', f'127.0.0.1:{port}', '--log-level', 'warning'],
+        cwd=BASE_DIR, env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', PATHS[0], headers={'Host': 'localhost'})
+            if connection.getresponse().status == 200:
+                return server
+        except OSError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f'{mode} server did not start')
+
+
+def run_load(port, requests, concurrency):
+    per_thread = requests // concurrency
+
+    def client(index):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        timings = []
+        for i in range(per_thread):
+            path = PATHS[(index + i) % len(PATHS)]
+            start = time.perf_counter()
+            connection.request('GET', path, headers={'Host': 'localhost'})
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                raise RuntimeError(f'{path}: {response.status}')
+            timings.append((time.perf_counter() - start) * 1000)
+        connection.close()
+        return timings
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        timings = [t for result in pool.map(client, range(concurrency)) for t in result]
+    return timings, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=3200)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--database-url')
+    args = parser.parse_args()
+
+    scratch = None
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        scratch = tempfile.NamedTemporaryFile(suffix='.sqlite3', delete=False)
+        os.environ['DATABASE_URL'] = f'sqlite:///{scratch.name}'
+    os.environ.pop('DEV', None)
+    setup_django()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    seed(users=20, posts_per_user=5)
+
+    try:
+        for mode in ('wsgi', 'asgi'):
+            server = start_server(mode, args.port, args.workers, os.environ)
+            try:
+                timings, elapsed = run_load(
+                    args.port, args.requests, args.concurrency
+                )
+            finally:
+                server.terminate()
+                server.wait()
+            report(f'{mode}, {args.workers} workers', timings)
+            print(f'{"":<48} {len(timings) / elapsed:8.1f} requests/s')
+    finally:
+        if scratch:
+            os.unlink(scratch.name)
+
+
+if __name__ == '__main__':
+    main()
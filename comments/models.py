@@ -3,10 +3,12 @@ from django.db import models
 # Create your models here.
 from django.db import models
 from django.contrib.auth.models import User
+from drf_api.cache import cache_dependency
+from drf_api.counters import CounterMixin, track
 from posts.models import Post
 
 
-class Comment(models.Model):
+class Comment(CounterMixin, models.Model):
     """
     Comment model, related to User and Post
     """
@@ -18,6 +20,16 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # a post's comments, newest first
+            models.Index(
+                fields=['post', '-created_at'], name='comment_post_created_idx'
+            ),
+        ]
 
     def __str__(self):
-        return self.content
\ No newline at end of file
+        return self.content
+
+
+track(Comment, 'post', Post, 'comments_count')
+cache_dependency(Comment, post=lambda comment: [comment.post_id])
@@ -1,36 +1,50 @@
-from django.contrib.humanize.templatetags.humanize import naturaltime
 from rest_framework import serializers
+from drf_api.humanize import naturaltime
+from drf_api.sparse import SparseFieldsMixin
+from drf_api.images import ImageVariantsField
 from .models import Comment
 
+iso_8601 = serializers.DateTimeField(format='iso-8601')
 
-class CommentSerializer(serializers.ModelSerializer):
+
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Comment model
     Adds three extra fields when returning a list of Comment instances
+    created_at and updated_at are relative, e.g. '2 minutes ago', or ISO 8601
+    with ?timestamps=iso, for clients humanizing them themselves
     """
     owner = serializers.ReadOnlyField(source='owner.username')
     is_owner = serializers.SerializerMethodField()
     profile_id = serializers.ReadOnlyField(source='owner.profile.id')
     profile_image = serializers.ReadOnlyField(source='owner.profile.image.url')
+    profile_image_variants = ImageVariantsField(source='owner.profile')
     created_at = serializers.SerializerMethodField()
     updated_at = serializers.SerializerMethodField()
 
     def get_is_owner(self, obj):
+        # compare ids, so sparse querysets don't need to join the owner
         request = self.context['request']
-        return request.user == obj.owner
+        return request.user.pk == obj.owner_id
     
     def get_created_at(self, obj):
-        return naturaltime(obj.created_at)
+        return self.format_time(obj.created_at)
     
     def get_updated_at(self, obj):
-        return naturaltime(obj.updated_at)
+        return self.format_time(obj.updated_at)
+
+    def format_time(self, value):
+        request = self.context.get('request')
+        if request is not None and request.query_params.get('timestamps') == 'iso':
+            return iso_8601.to_representation(value)
+        return naturaltime(value)
 
 
     class Meta:
         model = Comment
         fields = [
             'id', 'owner', 'is_owner', 'profile_id', 'profile_image',
-            'post', 'created_at', 'updated_at', 'content'
+            'profile_image_variants', 'post', 'created_at', 'updated_at', 'content'
         ]
 
 
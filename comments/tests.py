@@ -1,3 +1,60 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.contrib.humanize.templatetags import humanize
+from django.utils import timezone, translation
+from rest_framework.test import APITestCase
+from drf_api.humanize import naturaltime
+from posts.models import Post
+from .models import Comment
+
+
+class NaturalTimeTests(APITestCase):
+    # half way into their buckets, so both calls land in the same one
+    DELTAS = [
+        timedelta(0), timedelta(seconds=1.5), timedelta(seconds=30.5),
+        timedelta(minutes=1, seconds=30), timedelta(minutes=59, seconds=30),
+        timedelta(hours=3, minutes=30), timedelta(days=1, minutes=30),
+        timedelta(days=9, hours=5, seconds=30), timedelta(days=45),
+        timedelta(days=400), timedelta(days=4 * 365 + 30),
+    ]
+
+    def test_matches_django(self):
+        for language in ['en', 'de', 'fr']:
+            with translation.override(language):
+                for delta in self.DELTAS:
+                    for value in [timezone.now() - delta, timezone.now() + delta]:
+                        if delta and value > timezone.now():
+                            # the future loses time until the second call
+                            value += timedelta(seconds=0.5)
+                        self.assertEqual(
+                            naturaltime(value), humanize.naturaltime(value),
+                            (language, delta, value > timezone.now()),
+                        )
+
+    def test_buckets_are_shared(self):
+        now = timezone.now()
+        self.assertEqual(
+            naturaltime(now - timedelta(minutes=3), now),
+            naturaltime(now - timedelta(minutes=3, seconds=59), now),
+        )
+
+
+class CommentTimestampTests(APITestCase):
+    def setUp(self):
+        adam = User.objects.create_user(username='adam', password='pass')
+        post = Post.objects.create(owner=adam, title='a title')
+        self.comment = Comment.objects.create(owner=adam, post=post, content='c')
+        self.url = f'/api/comments/?post={post.id}'
+
+    def test_relative_timestamps(self):
+        Comment.objects.filter(pk=self.comment.pk).update(
+            created_at=timezone.now() - timedelta(hours=3, minutes=30)
+        )
+        result = self.client.get(self.url).data['results'][0]
+        self.assertEqual(result['created_at'], '3\xa0hours ago')
+
+    def test_iso_timestamps(self):
+        result = self.client.get(self.url, {'timestamps': 'iso'}).data['results'][0]
+        created_at = self.comment.created_at.isoformat().replace('+00:00', 'Z')
+        self.assertEqual(result['created_at'], created_at)
@@ -1,7 +1,8 @@
 from django.urls import path
+from drf_api.async_views import read_view
 from comments import views
 
 urlpatterns = [
-    path('comments/', views.CommentList.as_view()),
-    path('comments/<int:pk>/', views.CommentDetail.as_view()),
+    path('comments/', read_view(views.CommentList), name='comment-list'),
+    path('comments/<int:pk>/', read_view(views.CommentDetail)),
 ]
\ No newline at end of file
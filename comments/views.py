@@ -1,5 +1,10 @@
+import time
+
+from django.db.models import Count, Max
 from rest_framework import generics, permissions
+from drf_api.conditional import ConditionalGetMixin, checksum
 from drf_api.permissions import IsOwnerOrReadOnly
+from drf_api.sparse import SparseFieldsViewMixin
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Comment
 from .serializers import CommentSerializer, CommentDetailSerializer
@@ -10,14 +15,32 @@ from .serializers import CommentSerializer, CommentDetailSerializer
 # As we want to both list and create comments in the ListView, instead of explicitly defining the post and get methods
 # like we did before, we can extend teh generics ListCreateAPIView. Extending the ListAPIView means we won't have to write the get method
 # and the CreateAPIView takes care of the post method
-class CommentList(generics.ListCreateAPIView):
+class CommentVersionMixin(ConditionalGetMixin, SparseFieldsViewMixin):
+    """
+    created_at and updated_at are rendered relative to now,
+    e.g. '2 minutes ago', so the ETags also expire every minute.
+    """
+    version_aggregates = {
+        'count': Count('pk'),
+        'updated_at': Max('updated_at'),
+        'profile_updated_at': Max('owner__profile__updated_at'),
+        'owners': checksum('owner__username'),
+    }
+    version_fields = ('updated_at', 'owner.username', 'owner.profile.updated_at')
+
+    def get_viewer_version(self):
+        return [self.request.user.pk, int(time.time() // 60)]
+
+
+class CommentList(CommentVersionMixin, generics.ListCreateAPIView):
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     # Instead of specifying the model we'd like to us, in DRF we set the queryset attribute. This way it is possible to filter out some of the model instances
     # This would make sense if we were dealing with user sensitive data like orders or payments where we would need to make sure users can access and query only
     # their own data
-    queryset = Comment.objects.all()
+    # select_related joins the owner and profile the serializer reads for every comment
+    queryset = Comment.objects.select_related('owner__profile')
 
     filter_backends = [
         DjangoFilterBackend,
@@ -31,7 +54,7 @@ class CommentList(generics.ListCreateAPIView):
         serializer.save(owner=self.request.user)
 
 
-class CommentDetail(generics.RetrieveUpdateDestroyAPIView):
+class CommentDetail(CommentVersionMixin, generics.RetrieveUpdateDestroyAPIView):
     # we want only the comment owner to be able to edit or delete it
     permission_classes = [IsOwnerOrReadOnly]
 
@@ -39,4 +62,4 @@ class CommentDetail(generics.RetrieveUpdateDestroyAPIView):
     # Our serializer still needs to access teh request but we don't need to do anything as the request is passed in as part of the context object by default
     serializer_class = CommentDetailSerializer
 
-    queryset = Comment.objects.all()
\ No newline at end of file
+    queryset = Comment.objects.select_related('owner__profile', 'post')
\ No newline at end of file
@@ -0,0 +1,185 @@
+"""
+JWT cookie authentication with a cache of verified tokens.
+
+dj-rest-auth's JWTCookieAuthentication verifies the token's signature
+and loads the user row on every request. CachedJWTCookieAuthentication
+keeps the result per token signature for settings.JWT_AUTH_CACHE_TTL
+seconds, at most, and never past the token's expiry, in a bounded
+per-process cache, so repeat requests authenticate without a query.
+
+Each request gets its own User instance, built from the cached column
+values, so nothing a view does to request.user leaks into the next one.
+Logging out revokes the token, and saving or deleting a user bumps
+their version, both in the Django cache, which every process checks
+on each request, cached entry or not. That takes a cache shared by all
+workers, i.e. CACHE_BACKEND set to Redis or memcached, as with local
+memory each process only sees its own logouts and user changes.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from dj_rest_auth.jwt_auth import JWTCookieAuthentication
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+
+def token_signature(raw_token):
+    if isinstance(raw_token, bytes):
+        raw_token = raw_token.decode()
+    return raw_token.rpartition('.')[2]
+
+
+def revoked_key(signature):
+    return f'jwt-revoked:{signature}'
+
+
+def user_version_key(user_id):
+    return f'jwt-user-version:{user_id}'
+
+
+def bump_user_version(user_id):
+    key = user_version_key(user_id)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # evicted in between
+            cache.set(key, 1, None)
+
+
+class TokenCache:
+    """
+    Least recently used cache of (token, user values) by token signature,
+    with an expiry time and the user's version per entry.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.by_user = {}
+
+    def get(self, signature):
+        with self.lock:
+            entry = self.entries.get(signature)
+            if entry is None:
+                return None
+            if entry['expires'] <= time.monotonic():
+                self.remove(signature)
+                return None
+            self.entries.move_to_end(signature)
+            return entry
+
+    def set(self, signature, token, user, version, ttl):
+        values = {
+            field.attname: getattr(user, field.attname)
+            for field in user._meta.concrete_fields
+        }
+        with self.lock:
+            self.remove(signature)
+            self.entries[signature] = {
+                'expires': time.monotonic() + ttl,
+                'token': token,
+                'db': user._state.db,
+                'values': values,
+                'version': version,
+            }
+            self.by_user.setdefault(user.pk, set()).add(signature)
+            while len(self.entries) > settings.JWT_AUTH_CACHE_SIZE:
+                self.remove(next(iter(self.entries)))
+
+    def remove(self, signature):
+        entry = self.entries.pop(signature, None)
+        if entry is not None:
+            user_id = entry['values']['id']
+            signatures = self.by_user.get(user_id, set())
+            signatures.discard(signature)
+            if not signatures:
+                self.by_user.pop(user_id, None)
+
+    def discard(self, signature):
+        with self.lock:
+            self.remove(signature)
+
+    def discard_user(self, user_id):
+        with self.lock:
+            for signature in list(self.by_user.get(user_id, ())):
+                self.remove(signature)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.by_user.clear()
+
+
+token_cache = TokenCache()
+
+
+def revoke_token(raw_token):
+    """
+    Stop accepting raw_token, e.g. on logout, for the rest of its lifetime.
+    """
+    signature = token_signature(raw_token)
+    token_cache.discard(signature)
+    try:
+        token = CachedJWTCookieAuthentication().get_validated_token(raw_token)
+    except AuthenticationFailed:
+        return
+    cache.set(revoked_key(signature), True, max(1, token['exp'] - time.time()))
+
+
+class CachedJWTCookieAuthentication(JWTCookieAuthentication):
+    signature = None
+    cached = None
+
+    def get_validated_token(self, raw_token):
+        signature = self.signature = token_signature(raw_token)
+        cached = self.cached = token_cache.get(signature)
+        if cached is None:
+            revoked = cache.get(revoked_key(signature))
+        else:
+            # one round trip for both, as this is the hot path
+            version_key = user_version_key(cached['values']['id'])
+            shared = cache.get_many([revoked_key(signature), version_key])
+            revoked = shared.get(revoked_key(signature))
+            if revoked or shared.get(version_key) != cached['version']:
+                token_cache.discard(signature)
+                self.cached = None
+        if revoked:
+            raise AuthenticationFailed('Token has been revoked.', code='token_revoked')
+        if self.cached is not None:
+            return self.cached['token']
+        return super().get_validated_token(raw_token)
+
+    def get_user(self, validated_token):
+        if self.cached is not None:
+            values = self.cached['values']
+            return self.user_model.from_db(
+                self.cached['db'], list(values), list(values.values())
+            )
+        # read before the user, so a change in between drops the entry
+        version = cache.get(
+            user_version_key(validated_token.get(api_settings.USER_ID_CLAIM))
+        )
+        user = super().get_user(validated_token)
+        ttl = min(
+            settings.JWT_AUTH_CACHE_TTL, validated_token['exp'] - time.time()
+        )
+        if ttl > 0:
+            token_cache.set(self.signature, validated_token, user, version, ttl)
+        return user
+
+
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # logging in only touches last_login
+    if update_fields == frozenset(['last_login']):
+        return
+    token_cache.discard_user(instance.pk)
+    bump_user_version(instance.pk)
+
+
+post_save.connect(user_changed, sender=get_user_model())
+post_delete.connect(user_changed, sender=get_user_model())
@@ -0,0 +1,145 @@
+from django.db import router, transaction
+from rest_framework import generics, permissions, serializers
+from rest_framework.response import Response
+
+from .signals import bulk_created, bulk_deleted
+
+
+def delete_rows(queryset, using):
+    """
+    Delete the rows with a single DELETE, without sending pre_delete and
+    post_delete, for rows nothing else references. Callers send
+    bulk_deleted instead.
+
+    QuerySet.delete() would collect the rows, fetching them again and
+    sending both signals per row, and there's no public way to skip
+    that, hence the private _raw_delete(). Models that other rows
+    reference, which need the collector to cascade, and Django versions
+    without _raw_delete() go through delete(). DeleteRowsTests in
+    likes/tests.py pins this down.
+    """
+    model = queryset.model
+    if model._meta.related_objects or not hasattr(queryset, '_raw_delete'):
+        return queryset.delete()[0]
+    return queryset._raw_delete(using)
+
+
+class BulkTargetsSerializer(serializers.Serializer):
+    targets = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False
+    )
+
+
+class BulkOwnedView(generics.GenericAPIView):
+    """
+    Create or delete many of the logged in user's rows of a model that is
+    unique on (owner, target_field), e.g. likes of posts, in one request.
+    POST creates a row for every target id, DELETE removes them, both
+    with the ids in the list named by items_field, e.g. {"posts": [1, 2]}.
+
+    Inserts go through one bulk_create(ignore_conflicts=True), so rows
+    that already exist, or are created concurrently, are skipped by the
+    unique constraint, and deletes are a single DELETE ... WHERE id IN.
+    Neither sends post_save or post_delete, so the counters, caches and
+    feeds that listen to those are updated once for the batch through
+    bulk_created and bulk_deleted instead.
+
+    The response reports a status for each requested id, in order.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    model = None
+    target_field = None
+    items_field = None
+    max_items = 100
+
+    def get_target_ids(self, request):
+        serializer = BulkTargetsSerializer(data={
+            'targets': request.data.get(self.items_field)
+        })
+        if not serializer.is_valid():
+            raise serializers.ValidationError(
+                {self.items_field: serializer.errors['targets']}
+            )
+        # drop duplicates, keeping the order
+        ids = list(dict.fromkeys(serializer.validated_data['targets']))
+        if len(ids) > self.max_items:
+            raise serializers.ValidationError({
+                self.items_field:
+                    f'Ensure this field has no more than {self.max_items} elements.'
+            })
+        return ids
+
+    def get_owned(self, target_ids):
+        """
+        The user's existing rows for the targets, as {target id: row id}.
+        """
+        target_attname = self.model._meta.get_field(self.target_field).attname
+        return dict(
+            self.model.objects.filter(**{
+                'owner': self.request.user,
+                f'{target_attname}__in': target_ids,
+            }).values_list(target_attname, 'id')
+        )
+
+    def result(self, target_id, status, row_id=None):
+        result = {self.target_field: target_id, 'status': status}
+        if row_id is not None:
+            result['id'] = row_id
+        return result
+
+    def post(self, request, *args, **kwargs):
+        target_ids = self.get_target_ids(request)
+        target_model = self.model._meta.get_field(self.target_field).related_model
+        target_attname = self.model._meta.get_field(self.target_field).attname
+        using = router.db_for_write(self.model)
+        with transaction.atomic(using=using):
+            found = set(
+                target_model.objects.filter(pk__in=target_ids)
+                .values_list('pk', flat=True)
+            )
+            existing = self.get_owned(target_ids)
+            new = [
+                self.model(owner=request.user, **{target_attname: target_id})
+                for target_id in target_ids
+                if target_id in found and target_id not in existing
+            ]
+            self.model.objects.bulk_create(new, ignore_conflicts=True)
+            if new:
+                bulk_created.send(sender=self.model, instances=new)
+            # bulk_create doesn't return ids when ignoring conflicts
+            owned = self.get_owned(target_ids) if new else existing
+
+        results = []
+        for target_id in target_ids:
+            if target_id not in found:
+                results.append(self.result(target_id, 'not_found'))
+            elif target_id in existing:
+                results.append(self.result(target_id, 'exists', existing[target_id]))
+            else:
+                results.append(self.result(target_id, 'created', owned.get(target_id)))
+        return Response({'results': results})
+
+    def delete(self, request, *args, **kwargs):
+        target_ids = self.get_target_ids(request)
+        target_attname = self.model._meta.get_field(self.target_field).attname
+        using = router.db_for_write(self.model)
+        with transaction.atomic(using=using):
+            rows = list(
+                self.model.objects.select_for_update().filter(**{
+                    'owner': request.user, f'{target_attname}__in': target_ids,
+                }).order_by().only('id', 'owner_id', target_attname)
+            )
+            if rows:
+                delete_rows(
+                    self.model.objects.filter(pk__in=[row.pk for row in rows]),
+                    using,
+                )
+                bulk_deleted.send(sender=self.model, instances=rows)
+
+        deleted = {getattr(row, target_attname): row.pk for row in rows}
+        return Response({'results': [
+            self.result(target_id, 'deleted', deleted[target_id])
+            if target_id in deleted
+            else self.result(target_id, 'not_found')
+            for target_id in target_ids
+        ]})
@@ -0,0 +1,120 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework.response import Response
+
+from .compression import precompress
+from .conditional import make_etag, not_modified, set_validators
+from .db_routers import use_primary
+from .signals import bulk_created, bulk_deleted
+from .sparse import SparseFieldsViewMixin
+
+
+def object_cache_key(prefix, pk):
+    return f'object:{prefix}:{pk}'
+
+
+def invalidate(prefix, pks):
+    """
+    Drop the cached responses for the given objects, now and again once
+    the current transaction commits, so a request reading the old rows
+    in the meantime can't leave a stale entry behind.
+    """
+    keys = [object_cache_key(prefix, pk) for pk in pks if pk is not None]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def cache_dependency(sender, **dependents):
+    """
+    Invalidate cached objects whenever a sender row is saved or deleted.
+    Each keyword maps a cache prefix to a function returning the
+    ids of the objects that embed the instance, e.g.
+    cache_dependency(Like, post=lambda like: [like.post_id])
+    """
+    def receiver(sender, instance, **kwargs):
+        if kwargs.get('update_fields') == frozenset(['last_login']):
+            return
+        for prefix, get_pks in dependents.items():
+            invalidate(prefix, get_pks(instance))
+
+    def bulk_receiver(sender, instances, **kwargs):
+        for prefix, get_pks in dependents.items():
+            invalidate(prefix, {
+                pk for instance in instances for pk in get_pks(instance)
+            })
+
+    post_save.connect(receiver, sender=sender, weak=False)
+    post_delete.connect(receiver, sender=sender, weak=False)
+    bulk_created.connect(bulk_receiver, sender=sender, weak=False)
+    bulk_deleted.connect(bulk_receiver, sender=sender, weak=False)
+
+
+class ObjectCacheMixin(SparseFieldsViewMixin):
+    """
+    Mixin for detail views caching the serialized object.
+
+    The cache holds the viewer-independent part of the response, with
+    the viewer_fields blanked out, along with the owner's id.
+    get_viewer_fields() fills those in again for every request, so a hit
+    costs at most the one query needed for like_id or following_id.
+    Entries are dropped by the cache_dependency() signals in the models.
+
+    Entries also keep a digest of the cached data, which together with the
+    viewer fields makes the response's ETag, so a matching If-None-Match
+    gets a 304 without the object being loaded or serialized.
+
+    The whole object is cached, and ?fields= and ?omit= only pick from it,
+    so get_viewer_fields() can skip the viewer fields left out.
+    """
+    cache_prefix = None
+    viewer_fields = ()
+    trim_queryset = False
+
+    def get_viewer_fields(self, owner_id):
+        user = self.request.user
+        return {'is_owner': user.is_authenticated and user.pk == owner_id}
+
+    def get_extra_version(self):
+        """
+        Version of anything else in the response, e.g. included relations.
+        """
+        return None
+
+    def retrieve(self, request, *args, **kwargs):
+        key = object_cache_key(self.cache_prefix, self.kwargs[self.lookup_field])
+        entry = cache.get(key)
+        if entry is None:
+            # a lagging replica could cache data older than the last
+            # invalidation until the entry expires
+            with use_primary():
+                instance = self.get_object()
+                context = self.get_serializer_context()
+                context['fields'] = None
+                data = self.get_serializer(instance, context=context).data
+            shared = {
+                name: None if name in self.viewer_fields else value
+                for name, value in data.items()
+            }
+            entry = {
+                'owner_id': instance.owner_id,
+                'version': make_etag(shared),
+                'data': shared,
+            }
+            cache.set(key, entry, settings.OBJECT_CACHE_TIMEOUT)
+            viewer_fields = {name: data[name] for name in self.viewer_fields}
+        else:
+            viewer_fields = self.get_viewer_fields(entry['owner_id'])
+            data = dict(entry['data'])
+            data.update(viewer_fields)
+
+        etag = make_etag(
+            request.get_full_path(), entry['version'], viewer_fields,
+            self.get_extra_version(),
+        )
+        if self.get_field_names() is not None:
+            data = {name: value for name, value in data.items() if self.wants(name)}
+        response = not_modified(request, etag) or precompress(Response(data))
+        return set_validators(response, etag)
@@ -0,0 +1,141 @@
+import hashlib
+import json
+from functools import reduce
+from operator import add, attrgetter
+
+from django.db.models import BigIntegerField, Max, Subquery, Sum
+from django.db.models.functions import MD5, Ord, Substr
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from rest_framework import status
+from rest_framework.response import Response
+
+from .compression import precompress
+
+
+def make_etag(*parts):
+    """
+    Weak ETag over anything JSON can represent, as the same data
+    may be sent with or without compression.
+    """
+    digest = hashlib.md5(
+        json.dumps(parts, default=str, sort_keys=True).encode()
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+def latest_pk(queryset):
+    """
+    Aggregate of the newest primary key in queryset, for version_aggregates,
+    e.g. of the likes of each listed post through OuterRef('pk').
+    Primary keys aren't reused, so it changes with every insert, and
+    with a Sum of the counter the rows feed, which every delete lowers,
+    it versions that counter. A checksum of the counters alone can't
+    promise that, as changes to different rows may cancel out.
+    """
+    return Max(Subquery(queryset.order_by('-pk').values('pk')[:1]))
+
+
+def checksum(expression, digits=6):
+    """
+    Aggregate of a hash of a text column without an updated_at of its
+    own, for version_aggregates, e.g. owner__username. Each row adds the
+    first digits of its MD5, read with Ord(), as SQL that every backend
+    runs. 64 ** 6 per row keeps the sum within SQLite's integers.
+    """
+    digest = MD5(expression)
+    return Sum(reduce(add, [
+        Ord(Substr(digest, i + 1, 1)) * 64 ** i for i in range(digits)
+    ]), output_field=BigIntegerField())
+
+
+def not_modified(request, etag):
+    """
+    A 304 response if the request's If-None-Match matches etag, else None.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return None
+    tags = [tag.strip() for tag in header.split(',')]
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    if '*' in tags or any(
+        (tag[2:] if tag.startswith('W/') else tag) == opaque for tag in tags
+    ):
+        return Response(status=status.HTTP_304_NOT_MODIFIED)
+    return None
+
+
+def set_validators(response, etag):
+    """
+    Responses depend on who is asking, so they may only be reused by
+    that client, and only after revalidating with the ETag.
+    """
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Cookie', 'Authorization'])
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Mixin for generic views answering GETs with ETags, and If-None-Match
+    with 304 Not Modified before the serializer runs.
+
+    Lists are versioned by version_aggregates over the filtered queryset,
+    or the part of it the paginator's get_version_queryset() says a page
+    depends on. They must change whenever any listed row's representation
+    does, e.g. Max('updated_at') plus the count, the totals of counters
+    with latest_pk() of the rows they count, and checksum() of columns
+    from other tables.
+    Objects are versioned by version_fields, dotted attribute paths on
+    the instance. get_viewer_version() covers what differs per viewer.
+    """
+    version_aggregates = {}
+    version_fields = ('updated_at',)
+
+    def get_viewer_version(self):
+        return self.request.user.pk
+
+    def get_list_version(self):
+        # self.queryset rather than get_queryset(), as the views annotate
+        # viewer specific fields which the aggregates don't need
+        queryset = self.filter_queryset(self.queryset.all())
+        if hasattr(self.paginator, 'get_version_queryset'):
+            queryset = self.paginator.get_version_queryset(
+                queryset, self.request
+            )
+        else:
+            queryset = queryset.order_by()
+        if queryset.query.is_sliced or queryset.query.annotations:
+            # aggregates correlated through OuterRef('pk') can't reach into
+            # the subquery Django aggregates slices and annotations over,
+            # e.g. keyset pages and ranked searches
+            queryset = queryset.model.objects.filter(
+                pk__in=queryset.values('pk')
+            )
+        return queryset.aggregate(**self.version_aggregates)
+
+    def list(self, request, *args, **kwargs):
+        etag = make_etag(
+            request.get_full_path(), self.get_viewer_version(),
+            self.get_list_version(),
+        )
+        response = not_modified(request, etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+            # anonymous pages are the same for everyone
+            if not request.user.is_authenticated:
+                precompress(response)
+        return set_validators(response, etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = make_etag(
+            request.get_full_path(), self.get_viewer_version(),
+            [attrgetter(field)(instance) for field in self.version_fields],
+        )
+        response = not_modified(request, etag)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+        return set_validators(response, etag)
@@ -0,0 +1,137 @@
+from django.db import router, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+
+from .signals import bulk_created, bulk_deleted
+
+
+# Every counter registered with track(), used by recount() to repair drift
+COUNTERS = []
+
+
+class CounterMixin:
+    """
+    Model mixin for rows that own or bump denormalized counters.
+    save() runs in a transaction so the post_save handlers registered by
+    track() commit or roll back together with the row itself.
+    Updates never write counter_fields back, so a stale instance can't
+    overwrite increments made since it was loaded.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            self.counter_fields and not self._state.adding
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+        ):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+
+class Counter:
+    """
+    A stored count on target of the sender rows whose foreign key
+    sender_field points at the target's target_field.
+    """
+    def __init__(self, sender, sender_field, target, field, target_field):
+        self.sender = sender
+        self.sender_field = sender_field
+        self.target = target
+        self.field = field
+        self.target_field = target_field
+
+    def targets(self, key):
+        return self.target.objects.filter(**{self.target_field: key})
+
+    def key(self, instance):
+        return getattr(
+            instance, self.sender._meta.get_field(self.sender_field).attname
+        )
+
+    def increment(self, sender, instance, created, **kwargs):
+        if created:
+            self.targets(self.key(instance)).update(
+                **{self.field: F(self.field) + 1}
+            )
+
+    def decrement(self, sender, instance, **kwargs):
+        # a counter that drifted to 0 stays there until recount() repairs
+        # it, rather than failing the delete on the column's CHECK >= 0
+        self.targets(self.key(instance)).filter(
+            **{f'{self.field}__gt': 0}
+        ).update(**{self.field: F(self.field) - 1})
+
+    def refresh(self, sender, instances, **kwargs):
+        """
+        Recount the targets of rows added or removed in bulk.
+        """
+        keys = {self.key(instance) for instance in instances}
+        if keys:
+            self.recount(keys)
+
+    def actual(self):
+        """
+        Correlated subquery counting the sender rows for each target row.
+        """
+        return Coalesce(Subquery(
+            self.sender.objects.filter(
+                **{self.sender_field: OuterRef(self.target_field)}
+            ).order_by().values(self.sender_field).annotate(
+                count=Count('pk')
+            ).values('count')
+        ), 0)
+
+    def recount(self, keys=None):
+        """
+        Recompute the counter from the sender rows, for every target row
+        or only those whose target_field is in keys.
+        Returns the number of rows whose stored value had drifted.
+        """
+        targets = self.target.objects.all()
+        if keys is not None:
+            targets = targets.filter(**{f'{self.target_field}__in': keys})
+        drifted = list(
+            targets.annotate(actual=self.actual()).exclude(
+                **{self.field: F('actual')}
+            ).values_list('pk', flat=True)
+        )
+        if drifted:
+            self.target.objects.filter(pk__in=drifted).update(
+                **{self.field: self.actual()}
+            )
+        return len(drifted)
+
+
+def track(sender, sender_field, target, field, target_field='pk'):
+    """
+    Keep target.<field> up to date with F() increments and decrements
+    as sender rows are created and deleted.
+    """
+    counter = Counter(sender, sender_field, target, field, target_field)
+    post_save.connect(counter.increment, sender=sender, weak=False)
+    post_delete.connect(counter.decrement, sender=sender, weak=False)
+    bulk_created.connect(counter.refresh, sender=sender, weak=False)
+    bulk_deleted.connect(counter.refresh, sender=sender, weak=False)
+    COUNTERS.append(counter)
+    return counter
+
+
+def recount():
+    """
+    Repair every registered counter, returning the drifted rows
+    per 'model.field' label.
+    """
+    return {
+        f'{counter.target._meta.label}.{counter.field}': counter.recount()
+        for counter in COUNTERS
+    }
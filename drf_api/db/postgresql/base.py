@@ -0,0 +1,139 @@
+"""
+PostgreSQL backend adding what Django 3.2 lacks for reusing connections:
+
+- CONN_HEALTH_CHECKS, as in Django 4.1: a reused connection is checked
+  with a cheap query the first time a request uses it, and replaced if
+  the server dropped it, instead of failing that request.
+- OPTIONS['pool'] = {'min_size': ..., 'max_size': ..., 'timeout': ...},
+  like Django 5.1: connections come from a psycopg2 pool shared by the
+  process's threads and go back to it when Django closes them, so each
+  request skips the TLS handshake and authentication. Use it with
+  CONN_MAX_AGE = 0. When all max_size connections are in use, a thread
+  waits up to timeout seconds for one before failing with an
+  OperationalError. Every thread holds a connection until its request
+  ends, so max_size needs to cover the threads of a process, see
+  DB_POOL_MAX_SIZE in settings.
+"""
+import threading
+
+import psycopg2
+import psycopg2.extras
+from django.db.backends.postgresql import base
+from psycopg2.pool import ThreadedConnectionPool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class BlockingConnectionPool(ThreadedConnectionPool):
+    """
+    ThreadedConnectionPool waiting for a connection to be put back when
+    it's exhausted, rather than raising PoolError straight away.
+    """
+    def __init__(self, minconn, maxconn, timeout, *args, **kwargs):
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(self.maxconn)
+
+    def getconn(self, key=None):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise psycopg2.OperationalError(
+                f'No pooled connection became available '
+                f'within {self.timeout} seconds.'
+            )
+        try:
+            return super().getconn(key)
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        super().putconn(conn, key, close)
+        self.slots.release()
+
+
+def get_pool(alias, options, conn_params):
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = BlockingConnectionPool(
+                options.get('min_size', 1), options.get('max_size', 10),
+                options.get('timeout', 10), **conn_params
+            )
+        return _pools[alias]
+
+
+def close_pools():
+    """
+    Close every pooled connection, e.g. before dropping the database.
+    """
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.closeall()
+        _pools.clear()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+        self.pool = None
+
+    @property
+    def pool_options(self):
+        return self.settings_dict['OPTIONS'].get('pool')
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        if not self.pool_options:
+            return super().get_new_connection(conn_params)
+        self.pool = get_pool(self.alias, self.pool_options, conn_params)
+        connection = self.pool.getconn()
+        # what Django does to a new connection, see base.DatabaseWrapper
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get(
+            'isolation_level', connection.isolation_level
+        )
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def _close(self):
+        if self.pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # putconn() rolls back anything left open, and discards
+            # connections the server already closed
+            self.pool.putconn(self.connection)
+
+    def connect(self):
+        super().connect()
+        # a new connection is known to work, a pooled one may not
+        self.health_check_done = self.pool is None
+
+    def ensure_connection(self):
+        self.close_if_health_check_failed()
+        super().ensure_connection()
+
+    def close_if_health_check_failed(self):
+        if (
+            self.connection is None
+            or not self.settings_dict.get('CONN_HEALTH_CHECKS')
+            or self.health_check_done
+            or self.in_atomic_block
+        ):
+            return
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        # check reused connections again in the next request
+        self.health_check_done = False
+        super().close_if_unusable_or_obsolete()
@@ -0,0 +1,86 @@
+"""
+Read replica routing.
+
+ReplicaRoutingMiddleware picks one of settings.DATABASE_REPLICAS for
+each GET, HEAD and OPTIONS request, and ReplicaRouter then sends the
+request's reads of the app models there. A single replica per request
+keeps e.g. an ETag and the body it stands for consistent. Everything
+else, i.e. writes, reads in other requests, background tasks and
+management commands, and the auth and session tables, uses the primary.
+
+Replicas lag behind the primary, so a client that has just liked a post
+would otherwise not see its like_id. After any other request the
+middleware sets a cookie pinning the client to the primary for
+settings.REPLICA_PIN_SECONDS, so its own writes are always visible.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+REPLICATED_APPS = {'posts', 'profiles', 'comments', 'likes', 'followers'}
+PIN_COOKIE = 'db-primary-pin'
+
+# The current request's replica alias, or None for the primary. A context
+# variable rather than a thread local, as it has to follow the request
+# into the threads of drf_api/async_views.py
+_replica = ContextVar('replica', default=None)
+
+
+@contextmanager
+def use_primary():
+    """
+    Read from the primary inside the block, e.g. when the result
+    outlives the request and mustn't be stale.
+    """
+    token = _replica.set(None)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in REPLICATED_APPS:
+            return _replica.get()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        safe = request.method in SAFE_METHODS
+        replica = None
+        if safe and settings.DATABASE_REPLICAS and PIN_COOKIE not in request.COOKIES:
+            replica = random.choice(settings.DATABASE_REPLICAS)
+        token = _replica.set(replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica.reset(token)
+        if not safe and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite=settings.JWT_AUTH_SAMESITE,
+                secure=settings.JWT_AUTH_SECURE,
+            )
+        return response
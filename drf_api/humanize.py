@@ -0,0 +1,79 @@
+"""
+A memoized naturaltime, for serializers rendering relative times per row.
+
+django.contrib.humanize's naturaltime() builds its string through the
+translation machinery and timesince() on every call, which adds up on a
+page of comments. Its output only depends on the language and on a
+bucket of the time difference, e.g. '3 minutes ago' for anything from
+3 to 4 minutes back, so naturaltime() here renders each bucket once and
+then looks it up.
+"""
+from datetime import datetime
+
+from django.contrib.humanize.templatetags.humanize import NaturalTimeFormatter
+from django.utils.timesince import timesince, timeuntil
+from django.utils.timezone import is_aware, utc
+from django.utils.translation import get_language
+
+# Rendered strings per (language, bucket), cleared when full. The buckets
+# of a day or more are per minute, so a busy site keeps adding some
+MAX_ENTRIES = 10000
+_strings = {}
+
+
+def bucket(value, now):
+    """
+    The part of (value, now) naturaltime's output depends on.
+    """
+    past = value < now
+    delta = now - value if past else value - now
+    if delta.days != 0:
+        # timesince() counts whole minutes and corrects for the leap days
+        # between the two years
+        minutes = (delta.days * 86400 + delta.seconds) // 60
+        return (past, 'day', minutes, value.year, now.year)
+    if delta.seconds == 0:
+        return (None, 'now', 0)
+    if delta.seconds < 60:
+        return (past, 'second', delta.seconds)
+    if delta.seconds // 60 < 60:
+        return (past, 'minute', delta.seconds // 60)
+    return (past, 'hour', delta.seconds // 60 // 60)
+
+
+def render(value, now, key):
+    """
+    NaturalTimeFormatter.string_for(), with now passed in.
+    """
+    past, unit, count = key[:3]
+    strings = NaturalTimeFormatter.time_strings
+    if unit == 'now':
+        return str(strings['now'])
+    prefix = 'past' if past else 'future'
+    if unit == 'day':
+        delta = (
+            timesince(value, now, time_strings=NaturalTimeFormatter.past_substrings)
+            if past else
+            timeuntil(value, now, time_strings=NaturalTimeFormatter.future_substrings)
+        )
+        return strings[f'{prefix}-day'] % {'delta': delta}
+    return strings[f'{prefix}-{unit}'] % {'count': count}
+
+
+def naturaltime(value, now=None):
+    """
+    Same output as django.contrib.humanize's naturaltime filter.
+    """
+    if now is None:
+        now = datetime.now(utc if is_aware(value) else None)
+    key = bucket(value, now)
+    cache_key = (get_language(),) + key
+    try:
+        return _strings[cache_key]
+    except KeyError:
+        pass
+    string = render(value, now, key)
+    if len(_strings) >= MAX_ENTRIES:
+        _strings.clear()
+    _strings[cache_key] = string
+    return string
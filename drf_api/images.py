@@ -0,0 +1,270 @@
+"""
+Uploaded images: staging and processing them in the background, and
+width-bounded variants.
+
+With settings.ASYNC_IMAGE_UPLOADS, serializers using StagedImageMixin
+only size check an upload and write it to local disk, saving the row
+with image_status 'processing'. process_upload() then decodes and
+validates the image, strips its EXIF data, uploads it to storage and
+marks the row 'ready', or 'failed' if it isn't a usable image.
+
+Models with an ImageField add an image_variants JSONField and call
+track_variants(). Whenever a saved image differs from the one its
+variants were rendered from, render_variants() runs in the background,
+resizing it with Pillow into each of VARIANTS and saving the results
+to the default storage. Serializers expose the URLs with
+ImageVariantsField, falling back to the original until they exist.
+"""
+import hashlib
+import logging
+import os
+import uuid
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db.models.signals import post_save
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+from .tasks import run_in_background
+
+logger = logging.getLogger(__name__)
+
+# image_status values
+READY = 'ready'
+PROCESSING = 'processing'
+FAILED = 'failed'
+IMAGE_STATUS_CHOICES = [
+    (READY, 'Ready'), (PROCESSING, 'Processing'), (FAILED, 'Failed'),
+]
+MAX_DIMENSION = 4096
+
+# name: longest side in px
+VARIANTS = {
+    'thumbnail': 96,
+    'feed': 640,
+    'full': 1600,
+}
+VARIANT_FORMAT = 'JPEG'
+VARIANT_QUALITY = 85
+
+# Every model registered with track_variants()
+MODELS = []
+
+
+def is_default_image(image):
+    # the defaults live on Cloudinary and are never uploaded through the API
+    return not image or image.name == image.field.get_default()
+
+
+def fit(source, size):
+    image = source.copy()
+    image.thumbnail((size, size), Image.LANCZOS)
+    return image
+
+
+def encode(image):
+    output = BytesIO()
+    image.save(output, VARIANT_FORMAT, quality=VARIANT_QUALITY, optimize=True)
+    return output.getvalue()
+
+
+def open_source(image):
+    """
+    Decode an ImageField's file as upright RGB, ready for resizing.
+    """
+    with image.open('rb') as file:
+        return ImageOps.exif_transpose(Image.open(file)).convert('RGB')
+
+
+def render_variants(model_label, pk):
+    """
+    Render and store the variants of an instance's image, then save
+    their names along with the source image's name to image_variants.
+    """
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return
+    image = instance.image
+    if is_default_image(image):
+        return
+    source = open_source(image)
+    digest = hashlib.md5(image.name.encode()).hexdigest()[:12]
+    variants = {'source': image.name}
+    for name, size in VARIANTS.items():
+        path = os.path.join(
+            'variants', model._meta.model_name, str(pk), f'{digest}-{name}.jpg'
+        )
+        variants[name] = default_storage.save(
+            path, ContentFile(encode(fit(source, size)))
+        )
+
+    # the image may have been replaced while we were rendering
+    if model.objects.filter(pk=pk, image=image.name).exists():
+        instance.image_variants = variants
+        # updated_at moves too, so ETags change with the new URLs
+        instance.save(update_fields=['image_variants', 'updated_at'])
+
+
+def needs_variants(instance):
+    image = instance.image
+    return (
+        not is_default_image(image)
+        and image.name != instance.image_variants.get('source')
+    )
+
+
+def schedule_variants(sender, instance, **kwargs):
+    if needs_variants(instance):
+        run_in_background(render_variants, sender._meta.label, instance.pk)
+
+
+def track_variants(model):
+    MODELS.append(model)
+    post_save.connect(schedule_variants, sender=model)
+
+
+def render_missing_variants():
+    """
+    Render the variants of every image lacking up to date ones, e.g. images
+    uploaded before variants existed. Returns the count per model label.
+    """
+    rendered = {}
+    for model in MODELS:
+        rendered[model._meta.label] = 0
+        for instance in model.objects.only('pk', 'image', 'image_variants'):
+            if needs_variants(instance):
+                render_variants(model._meta.label, instance.pk)
+                rendered[model._meta.label] += 1
+    return rendered
+
+
+def variant_urls(instance):
+    """
+    URL of each variant of instance.image, or of the original image
+    for variants that haven't been rendered yet. None without an image.
+    """
+    if not instance.image:
+        return None
+    return build_variant_urls(
+        instance.image.name, instance.image.url, instance.image_variants
+    )
+
+
+def build_variant_urls(name, url, variants, storage_url=None):
+    """
+    variant_urls() from the column values, for rows read with values().
+    """
+    if not name:
+        return None
+    storage_url = storage_url or default_storage.url
+    if variants.get('source') != name:
+        variants = {}
+    return {
+        variant: storage_url(variants[variant]) if variant in variants else url
+        for variant in VARIANTS
+    }
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    The variant URLs of the image of the instance at source, e.g.
+    ImageVariantsField(source='owner.profile') for the owner's avatar.
+    """
+    def to_representation(self, value):
+        return variant_urls(value)
+
+
+def get_staging_storage():
+    return FileSystemStorage(location=settings.IMAGE_STAGING_ROOT)
+
+
+def strip_metadata(image):
+    """
+    Re-encode image in its own format, rotated as its EXIF orientation
+    says but without the EXIF data itself, e.g. GPS coordinates.
+    """
+    output = BytesIO()
+    cleaned = ImageOps.exif_transpose(image)
+    cleaned.save(
+        output, image.format, icc_profile=image.info.get('icc_profile')
+    )
+    return output.getvalue()
+
+
+def process_upload(model_label, pk, staged_name):
+    model = apps.get_model(model_label)
+    staging = get_staging_storage()
+    try:
+        instance = model.objects.filter(pk=pk).first()
+        if instance is None:
+            return
+        try:
+            with staging.open(staged_name) as file:
+                image = Image.open(file)
+                if max(image.size) > MAX_DIMENSION:
+                    raise ValueError(
+                        f'{image.width}x{image.height} exceeds {MAX_DIMENSION}px'
+                    )
+                content = strip_metadata(image)
+            # the staged name is prefixed with a uuid to keep it unique
+            name = staged_name.split('-', 1)[-1]
+            instance.image.save(name, ContentFile(content), save=False)
+            instance.image_status = READY
+        except (OSError, ValueError, Image.DecompressionBombError) as error:
+            logger.warning('Rejected %s %s image: %s', model_label, pk, error)
+            instance.image_status = FAILED
+        except Exception:
+            # e.g. the storage API failing, which would otherwise leave
+            # the row 'processing' with its staged file gone
+            logger.exception('Failed to process %s %s image', model_label, pk)
+            instance.image_status = FAILED
+        instance.save(update_fields=['image', 'image_status', 'updated_at'])
+    finally:
+        staging.delete(staged_name)
+
+
+class StagedImageMixin:
+    """
+    Serializer mixin moving image decoding and uploading out of the
+    request when settings.ASYNC_IMAGE_UPLOADS is on. The model needs an
+    image_status field, which clients can poll until it's 'ready'.
+    """
+    def get_fields(self):
+        fields = super().get_fields()
+        if settings.ASYNC_IMAGE_UPLOADS and 'image' in fields:
+            # a plain FileField doesn't open the upload with Pillow
+            fields['image'] = serializers.FileField(required=False)
+        return fields
+
+    def create(self, validated_data):
+        upload = self.pop_upload(validated_data)
+        instance = super().create(validated_data)
+        self.stage(instance, upload)
+        return instance
+
+    def update(self, instance, validated_data):
+        upload = self.pop_upload(validated_data)
+        instance = super().update(instance, validated_data)
+        self.stage(instance, upload)
+        return instance
+
+    def pop_upload(self, validated_data):
+        if not settings.ASYNC_IMAGE_UPLOADS or not validated_data.get('image'):
+            return None
+        validated_data['image_status'] = PROCESSING
+        return validated_data.pop('image')
+
+    def stage(self, instance, upload):
+        if upload is None:
+            return
+        staged_name = get_staging_storage().save(
+            f'{uuid.uuid4().hex}-{upload.name}', upload
+        )
+        run_in_background(
+            process_upload, instance._meta.label, instance.pk, staged_name
+        )
@@ -0,0 +1,55 @@
+"""
+Session, CSRF, authentication and messages middleware that stay out of
+the way of the stateless API routes.
+
+In production the API authenticates with the JWT cookie alone, so for
+paths under settings.STATELESS_API_PREFIX these subclasses of Django's
+middleware hand the request straight on: no session store, no lazy
+request.user, no message storage and no CSRF bookkeeping. dj-rest-auth's
+login and registration log the user into a session as well, so paths
+under settings.STATEFUL_API_PREFIXES, as well as the admin and
+api-auth/, get the full stack. Being subclasses, they still satisfy the
+admin's system checks.
+"""
+from django.conf import settings
+from django.contrib.auth import middleware as auth
+from django.contrib.messages import middleware as messages
+from django.contrib.sessions import middleware as sessions
+from django.middleware import csrf
+
+
+def is_stateless(request):
+    path = request.path_info
+    return (
+        settings.STATELESS_API
+        and path.startswith(settings.STATELESS_API_PREFIX)
+        and not path.startswith(tuple(settings.STATEFUL_API_PREFIXES))
+    )
+
+
+class StatelessRoutesMixin:
+    def __call__(self, request):
+        if is_stateless(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(StatelessRoutesMixin, sessions.SessionMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(StatelessRoutesMixin, csrf.CsrfViewMiddleware):
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if is_stateless(request):
+            return None
+        return super().process_view(
+            request, callback, callback_args, callback_kwargs
+        )
+
+
+class AuthenticationMiddleware(StatelessRoutesMixin, auth.AuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(StatelessRoutesMixin, messages.MessageMiddleware):
+    pass
@@ -0,0 +1,146 @@
+import base64
+import binascii
+import json
+from types import SimpleNamespace
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework import exceptions
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CursorOptInPagination(PageNumberPagination):
+    """
+    Page number pagination with an opt-in keyset mode for infinite scroll.
+
+    Passing ?cursor= (empty for the first page) pages by the queryset's
+    ordering plus the primary key as a tiebreaker, e.g. (created_at, id).
+    Keyset pages don't run COUNT(*) or OFFSET, so they stay fast however
+    deep the client scrolls, and posts created in the meantime don't
+    shift later pages. The response has next/previous/results but no count,
+    and previous is always null since feeds only scroll forwards.
+    """
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        rows = list(self.keyset_window(queryset, request))
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def keyset_window(self, queryset, request):
+        """
+        The rows a keyset page reads: the page itself plus one more
+        to tell whether there is a next page.
+        """
+        self.ordering = self.get_keyset_ordering(queryset)
+        queryset = queryset.order_by(*[
+            f'-{field.name}' if descending else field.name
+            for field, descending in self.ordering
+        ])
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            queryset = queryset.filter(self.after(self.decode_cursor(cursor)))
+        return queryset[:self.get_page_size(request) + 1]
+
+    def get_version_queryset(self, queryset, request):
+        """
+        The rows whose versions decide a page's ETag, see ConditionalGetMixin.
+        Keyset pages only depend on their window, while page numbers
+        depend on the count and so on the whole queryset.
+        """
+        if self.cursor_query_param in request.query_params:
+            return self.keyset_window(queryset, request)
+        return queryset.order_by()
+
+    def get_keyset_ordering(self, queryset):
+        """
+        Turn the queryset's ordering into (field, descending) pairs ending
+        in the primary key. Only concrete, non-null columns of the model
+        itself give a stable keyset, so orderings across relations
+        (e.g. likes__created_at) are rejected.
+        """
+        opts = queryset.model._meta
+        ordering = []
+        for name in queryset.query.order_by or opts.ordering:
+            field = None
+            if isinstance(name, str):
+                descending = name.startswith('-')
+                name = name.lstrip('-')
+                try:
+                    field = opts.pk if name == 'pk' else opts.get_field(name)
+                except FieldDoesNotExist:
+                    pass
+            if field is None or not field.concrete or field.null:
+                raise exceptions.ValidationError({
+                    'ordering': f"'{name}' can't be used with cursor pagination."
+                })
+            ordering.append((field, descending))
+        if not any(field.primary_key for field, _ in ordering):
+            descending = ordering[-1][1] if ordering else False
+            ordering.append((opts.pk, descending))
+        return ordering
+
+    def after(self, values):
+        """
+        Keyset condition for rows after values in the current ordering:
+        (a > x) OR (a = x AND b > y) OR ..., with < for descending fields.
+        """
+        condition = Q()
+        equal = {}
+        for (field, descending), value in zip(self.ordering, values):
+            lookup = 'lt' if descending else 'gt'
+            condition |= Q(**equal, **{f'{field.attname}__{lookup}': value})
+            equal[field.attname] = value
+        return condition
+
+    def encode_cursor(self, instance):
+        # rows of .values() querysets, see drf_api.values, are dicts
+        if isinstance(instance, dict):
+            instance = SimpleNamespace(**instance)
+        values = [field.value_to_string(instance) for field, _ in self.ordering]
+        return base64.urlsafe_b64encode(
+            json.dumps(values).encode()
+        ).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(
+                base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            )
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                field.to_python(value)
+                for (field, _), value in zip(self.ordering, values)
+            ]
+        except (binascii.Error, TypeError, ValueError, ValidationError):
+            raise exceptions.NotFound('Invalid cursor.')
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.page[-1]),
+        )
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'previous': None,
+            'results': data,
+        })
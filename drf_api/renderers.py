@@ -0,0 +1,53 @@
+"""
+JSON renderer backed by orjson, when it's installed.
+
+orjson encodes the serializers' lists of dicts several times faster
+than the stdlib json module. The output is the same as DRF's
+JSONRenderer with our settings (compact, UTF-8, strict), byte for byte:
+datetimes, dates, times and dataclasses are handed to DRF's encoder, as
+are the types orjson doesn't know, and U+2028 and U+2029 are escaped.
+Pretty printing, integers beyond 64 bits and settings orjson can't
+match fall back to DRF's renderer. Floats are where the two differ, and
+no endpoint renders those: an exponent renders as 1e16 rather than
+1e+16, and NaN and infinities render as null, where DRF's strict mode
+raises a ValueError. Checking every value for them would cost much of
+what orjson saves.
+"""
+from rest_framework import renderers
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    OPTIONS = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    def can_use_orjson(self, accepted_media_type, renderer_context):
+        return (
+            orjson is not None
+            and self.compact and not self.ensure_ascii and self.strict
+            and self.get_indent(accepted_media_type, renderer_context) is None
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or not self.can_use_orjson(
+            accepted_media_type, renderer_context or {}
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=OPTIONS
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # as DRF does, so the output stays a strict javascript subset
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029'
+        )
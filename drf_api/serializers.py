@@ -1,12 +1,14 @@
 from dj_rest_auth.serializers import UserDetailsSerializer
 from rest_framework import serializers
+from .images import ImageVariantsField
 
 
 class CurrentUserSerializer(UserDetailsSerializer):
     profile_id = serializers.ReadOnlyField(source='profile.id')
     profile_image = serializers.ReadOnlyField(source='profile.image.url')
+    profile_image_variants = ImageVariantsField(source='profile')
 
     class Meta(UserDetailsSerializer.Meta):
         fields = UserDetailsSerializer.Meta.fields + (
-            'profile_id', 'profile_image'
+            'profile_id', 'profile_image', 'profile_image_variants'
         )
\ No newline at end of file
@@ -12,7 +12,9 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 
 from pathlib import Path
 import os 
+import tempfile
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 if os.path.exists('env.py'):
     import env 
@@ -30,24 +32,44 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [(
         'rest_framework.authentication.SessionAuthentication'
         if 'DEV' in os.environ
-        else 'dj_rest_auth.jwt_auth.JWTCookieAuthentication'
+        else 'drf_api.authentication.CachedJWTCookieAuthentication'
     )],
     'DEFAULT_PAGINATION_CLASS':
-        'rest_framework.pagination.PageNumberPagination',
+        'drf_api.pagination.CursorOptInPagination',
     'PAGE_SIZE': 10,
     'DATETIME_FORMAT': '%d %b %Y',
+    # orjson backed JSON when it's installed, see drf_api/renderers.py
+    'DEFAULT_RENDERER_CLASSES': [
+        'drf_api.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'drf_api.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 if 'DEV' not in os.environ:
     REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
-        'rest_framework.renderers.JSONRenderer',
+        'drf_api.renderers.JSONRenderer',
     ]
 
+# Full-text search for posts, see posts/search.py. Set to 'auto' to use
+# Postgres full-text search in production and FTS5 with SQLite
+POST_SEARCH_BACKEND = os.environ.get('POST_SEARCH_BACKEND')
+
 REST_USE_JWT = True
 JWT_AUTH_SECURE = True
 JWT_AUTH_COOKIE = 'my-app-auth'
 JWT_AUTH_REFRESH_COOKIE = 'my-refresh-token'
 JWT_AUTH_SAMESITE = 'None'
 
+# Seconds a verified JWT and its user are reused without a query, and how
+# many tokens each process keeps, see drf_api/authentication.py. Logouts and
+# user changes only reach every worker through a shared CACHE_BACKEND
+JWT_AUTH_CACHE_TTL = int(os.environ.get('JWT_AUTH_CACHE_TTL', 60))
+JWT_AUTH_CACHE_SIZE = int(os.environ.get('JWT_AUTH_CACHE_SIZE', 10000))
+
 REST_AUTH_SERIALIZERS = {
     'USER_DETAILS_SERIALIZER': 'drf_api.serializers.CurrentUserSerializer'
 }
@@ -94,20 +116,30 @@ INSTALLED_APPS = [
     'comments',
     'likes',
     'followers',
+    'feed',
 ]
 SITE_ID = 1
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'drf_api.compression.CompressionMiddleware',
+    'drf_api.db_routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'drf_api.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'drf_api.middleware.CsrfViewMiddleware',
+    'drf_api.middleware.AuthenticationMiddleware',
+    'drf_api.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# With JWT authentication the API doesn't use sessions, so the session,
+# CSRF, auth and messages middleware skip it, except for dj-rest-auth's
+# login and registration, see drf_api/middleware.py
+STATELESS_API = 'DEV' not in os.environ
+STATELESS_API_PREFIX = '/api/'
+STATEFUL_API_PREFIXES = ['/api/dj-rest-auth/']
+
 CORS_ALLOWED_ORIGINS = [
     os.environ.get('CLIENT_ORIGIN')
 ]
@@ -134,21 +166,127 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'drf_api.wsgi.application'
 
+# Set ASGI to serve drf_api.asgi under uvicorn workers, see gunicorn.conf.py.
+# The post, profile and comment views then read on a thread pool of
+# ASYNC_READ_THREADS per worker, see drf_api/async_views.py
+ASGI_MODE = 'ASGI' in os.environ
+ASYNC_READ_THREADS = int(os.environ.get('ASYNC_READ_THREADS', 8))
+
 
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Connections are kept open for DB_CONN_MAX_AGE seconds and reused by
+# later requests. With DB_POOL_MAX_SIZE they come from a pool of up to
+# that many per process instead, waiting up to DB_POOL_TIMEOUT seconds
+# for a free one, see drf_api/db/postgresql/base.py. Each thread holds
+# one for its whole request, so under ASGI the pool has to fit the
+# ASYNC_READ_THREADS plus the thread handling writes
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 0))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+if ASGI_MODE and 0 < DB_POOL_MAX_SIZE < ASYNC_READ_THREADS + 1:
+    raise ImproperlyConfigured(
+        f'DB_POOL_MAX_SIZE must be at least ASYNC_READ_THREADS + 1 '
+        f'({ASYNC_READ_THREADS + 1}) when serving over ASGI.'
+    )
+
+
+def parse_database_url(url):
+    database = dj_database_url.parse(
+        url,
+        conn_max_age=(
+            0 if DB_POOL_MAX_SIZE
+            else int(os.environ.get('DB_CONN_MAX_AGE', 60))
+        ),
+    )
+    if 'postgresql' in database['ENGINE']:
+        database.update({
+            'ENGINE': 'drf_api.db.postgresql',
+            'CONN_HEALTH_CHECKS':
+                os.environ.get('DB_CONN_HEALTH_CHECKS', '1') != '0',
+        })
+        if DB_POOL_MAX_SIZE:
+            database.setdefault('OPTIONS', {})['pool'] = {
+                'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+                'max_size': DB_POOL_MAX_SIZE,
+                'timeout': DB_POOL_TIMEOUT,
+            }
+    return database
+
+
 if 'DEV' in os.environ:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
-        }
+        },
+        # a second connection to the same database, unused unless listed
+        # in DATABASE_REPLICAS, for testing the replica routing end to end
+        'replica_test': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'TEST': {'MIRROR': 'default'},
+        },
     }
 else:
     DATABASES = {
-        'default': dj_database_url.parse(os.environ.get("DATABASE_URL"))
+        'default': parse_database_url(os.environ.get("DATABASE_URL"))
+    }
+
+# Read replicas, as a comma separated DATABASE_REPLICA_URLS. Reads of the
+# app models in GET requests go to a random replica, except for clients
+# who wrote in the last REPLICA_PIN_SECONDS, see drf_api/db_routers.py.
+# The test databases mirror default, but as a TestCase's writes are never
+# committed the suite runs without DATABASE_REPLICA_URLS, and only
+# ReplicaQueryTests routes to a replica, replica_test in development
+DATABASE_REPLICAS = []
+for index, url in enumerate(
+    filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(','))
+):
+    alias = f'replica_{index}'
+    DATABASES[alias] = parse_database_url(url.strip())
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['drf_api.db_routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 10))
+
+
+# Cache
+# CACHE_BACKEND can point at any Django cache backend, e.g. file based
+# caching or a Redis/memcached backend shared by all workers.
+# Local memory is per process, which is fine for a single dyno
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
+}
+
+# Seconds PostDetail and ProfileDetail keep a cached object, see drf_api/cache.py
+OBJECT_CACHE_TIMEOUT = int(os.environ.get('OBJECT_CACHE_TIMEOUT', 300))
+
+# gzip or brotli for JSON API responses of at least COMPRESSION_MIN_SIZE
+# bytes, see drf_api/compression.py
+COMPRESSION_PATH_PREFIXES = ['/api/']
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_CACHE_TIMEOUT = OBJECT_CACHE_TIMEOUT
+
+# Background tasks, e.g. rendering image variants, see drf_api/tasks.py
+BACKGROUND_TASK_WORKERS = int(os.environ.get('BACKGROUND_TASK_WORKERS', 2))
+BACKGROUND_TASKS_EAGER = 'BACKGROUND_TASKS_EAGER' in os.environ
+
+# With ASYNC_IMAGE_UPLOADS, post images are staged on local disk and decoded,
+# validated and uploaded to storage in the background, see drf_api/images.py
+ASYNC_IMAGE_UPLOADS = 'ASYNC_IMAGE_UPLOADS' in os.environ
+IMAGE_STAGING_ROOT = os.environ.get(
+    'IMAGE_STAGING_ROOT', os.path.join(tempfile.gettempdir(), 'drf_api_uploads')
+)
+
+# Render each post's image_filter into image files, see posts/image_filters.py
+RENDER_IMAGE_FILTERS = 'RENDER_IMAGE_FILTERS' in os.environ
 
 
 # Password validation
@@ -0,0 +1,8 @@
+from django.dispatch import Signal
+
+# Sent by drf_api/bulk.py after rows were inserted with bulk_create() or
+# removed with a single DELETE, neither of which sends post_save or
+# post_delete. Receivers get the affected instances, so they can update
+# counters, caches and feeds once for the whole batch.
+bulk_created = Signal()  # sender, instances
+bulk_deleted = Signal()  # sender, instances
@@ -0,0 +1,121 @@
+"""
+Sparse fieldsets: ?fields=id,title renders only the given fields and
+?omit=content all but the given ones, on every list and detail view.
+
+SparseFieldsViewMixin parses the query parameters and passes the field
+names to the serializer, whose SparseFieldsMixin drops the others before
+anything is rendered. The view also narrows its select_related() to the
+relations the remaining fields read, and views skip the annotations
+behind fields that weren't asked for, e.g. like_id, see wants().
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import exceptions, serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin rendering only context['fields'], when set.
+    """
+    def get_fields(self):
+        fields = super().get_fields()
+        names = self.context.get('fields')
+        if names is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in names}
+
+
+def related_paths(model, fields):
+    """
+    The select_related() paths the serializer fields read through, e.g.
+    'owner__profile' for source='owner.profile.image.url'.
+    """
+    paths = set()
+    for field in fields:
+        if field.source == '*':
+            continue
+        attrs = field.source.split('.')
+        # primary key fields only read the foreign key column
+        if isinstance(field, serializers.RelatedField):
+            attrs = attrs[:-1]
+        opts, path = model._meta, []
+        for attr in attrs:
+            try:
+                relation = opts.get_field(attr)
+            except FieldDoesNotExist:
+                break
+            if not (relation.many_to_one or relation.one_to_one):
+                break
+            path.append(attr)
+            opts = relation.related_model._meta
+        if path:
+            paths.add('__'.join(path))
+    return paths
+
+
+class SparseFieldsViewMixin:
+    """
+    View mixin for ?fields= and ?omit=, on safe requests only, as
+    writes validate and return the whole object.
+    trim_queryset=False keeps the view's own select_related(), for views
+    serializing more than the response shows, e.g. to cache it.
+    """
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+    trim_queryset = True
+
+    def get_field_names(self):
+        """
+        The names of the fields to render, or None for all of them.
+        """
+        if hasattr(self, '_field_names'):
+            return self._field_names
+        self._field_names = None
+        params = self.request.query_params
+        if self.request.method not in SAFE_METHODS or not (
+            self.fields_query_param in params or self.omit_query_param in params
+        ):
+            return None
+
+        available = list(self.get_serializer_class()().fields)
+        names = set(available)
+        for param in (self.fields_query_param, self.omit_query_param):
+            if param not in params:
+                continue
+            given = {name for name in params[param].split(',') if name}
+            unknown = given - set(available)
+            if unknown:
+                raise exceptions.ValidationError({
+                    param: f"Unknown fields: {', '.join(sorted(unknown))}."
+                })
+            if param == self.fields_query_param:
+                names &= given
+            else:
+                names -= given
+        self._field_names = names
+        return names
+
+    def wants(self, name):
+        names = self.get_field_names()
+        return names is None or name in names
+
+    def get_related_paths(self):
+        serializer = self.get_serializer()
+        return related_paths(
+            serializer.Meta.model, serializer.fields.values()
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_field_names()
+        return context
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.trim_queryset and self.get_field_names() is not None:
+            paths = self.get_related_paths()
+            queryset = queryset.select_related(None)
+            # select_related() without paths would follow every relation
+            if paths:
+                queryset = queryset.select_related(*paths)
+        return queryset
@@ -0,0 +1,46 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BACKGROUND_TASK_WORKERS,
+            thread_name_prefix='background-task',
+        )
+    return _executor
+
+
+def run_task(func, *args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Background task %s%r failed', func.__name__, args)
+    finally:
+        # the worker threads aren't request threads,
+        # so nothing else closes their connections
+        close_old_connections()
+
+
+def run_in_background(func, *args):
+    """
+    Run func(*args) on a worker thread once the current transaction
+    commits, so it sees the rows the request saved and the response
+    doesn't wait for it. With settings.BACKGROUND_TASKS_EAGER, e.g. in
+    tests, it runs inline on commit instead.
+    """
+    def submit():
+        if settings.BACKGROUND_TASKS_EAGER:
+            func(*args)
+        else:
+            get_executor().submit(run_task, func, *args)
+
+    transaction.on_commit(submit)
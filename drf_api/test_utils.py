@@ -0,0 +1,32 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountMixin:
+    """
+    Mixin for APITestCase classes checking that an endpoint runs a fixed
+    number of queries, i.e. no nested source triggers a lazy load per row.
+    """
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def assertQueryCountIndependentOfPageSize(self, url, make_row, sizes=(2, 8)):
+        """
+        Request url with sizes[0] and then sizes[1] rows, created by calling
+        make_row(index), and fail if the second request needs more queries.
+        """
+        created = 0
+        counts = []
+        for size in sizes:
+            while created < size:
+                make_row(created)
+                created += 1
+            counts.append(self.count_queries(url))
+        self.assertEqual(
+            counts[0], counts[-1],
+            f'{url} ran {counts[0]} queries for {sizes[0]} rows '
+            f'but {counts[-1]} for {sizes[-1]} rows'
+        )
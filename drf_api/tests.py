@@ -0,0 +1,738 @@
+import asyncio
+import gzip
+import io
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+import psycopg2
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.conf import settings
+from django.db import OperationalError, connection, connections, router
+from django.db.utils import load_backend
+from django.test import SimpleTestCase, override_settings
+from django.http import HttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.utils.translation import gettext_lazy
+from rest_framework import renderers
+from rest_framework.exceptions import AuthenticationFailed, ParseError
+from rest_framework.response import Response
+from rest_framework.test import (
+    APIRequestFactory, APITestCase, APITransactionTestCase,
+)
+from rest_framework.views import APIView
+from comments.models import Comment
+from followers.models import Follower
+from likes.models import Like
+from posts.models import Post
+from posts.views import PostList
+from rest_framework_simplejwt.tokens import AccessToken
+from .async_views import read_view
+from .authentication import (
+    CachedJWTCookieAuthentication, bump_user_version, revoked_key,
+    token_cache, token_signature,
+)
+from . import compression
+from .db_routers import PIN_COOKIE, ReplicaRoutingMiddleware, use_primary
+from .parsers import JSONParser
+from . import renderers as api_renderers
+from .renderers import JSONRenderer
+from .test_utils import QueryCountMixin
+
+
+class EndpointQueryCountTests(QueryCountMixin, APITestCase):
+    """
+    Every list endpoint must run the same number of queries
+    however many rows end up on the page.
+    """
+    def setUp(self):
+        cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.post = Post.objects.create(owner=self.adam, title='a title')
+        self.client.login(username='adam', password='pass')
+
+    def make_user(self, index):
+        return User.objects.create_user(username=f'user{index}', password='pass')
+
+    def test_posts(self):
+        self.assertQueryCountIndependentOfPageSize(
+            '/api/posts/',
+            lambda i: Post.objects.create(owner=self.make_user(i), title='t')
+        )
+
+    def test_profiles(self):
+        self.assertQueryCountIndependentOfPageSize(
+            '/api/profiles/', self.make_user
+        )
+
+    def test_comments(self):
+        self.assertQueryCountIndependentOfPageSize(
+            f'/api/comments/?post={self.post.id}',
+            lambda i: Comment.objects.create(
+                owner=self.make_user(i), post=self.post, content='c'
+            )
+        )
+
+    def test_likes(self):
+        self.assertQueryCountIndependentOfPageSize(
+            '/api/likes/',
+            lambda i: Like.objects.create(owner=self.make_user(i), post=self.post)
+        )
+
+    def test_followers(self):
+        self.assertQueryCountIndependentOfPageSize(
+            '/api/followers/',
+            lambda i: Follower.objects.create(
+                owner=self.make_user(i), followed=self.adam
+            )
+        )
+
+    def test_detail_views_join_their_relations(self):
+        comment = Comment.objects.create(
+            owner=self.adam, post=self.post, content='c'
+        )
+        like = Like.objects.create(owner=self.adam, post=self.post)
+        follower = Follower.objects.create(
+            owner=self.adam, followed=self.make_user(0)
+        )
+        # session and user lookups plus a single query for the object
+        for url in [
+            f'/api/posts/{self.post.id}/',
+            f'/api/profiles/{self.adam.profile.id}/',
+            f'/api/comments/{comment.id}/',
+            f'/api/likes/{like.id}/',
+            f'/api/followers/{follower.id}/',
+        ]:
+            self.assertEqual(self.count_queries(url), 3, url)
+
+
+class CursorPaginationTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        for i in range(15):
+            Post.objects.create(owner=self.adam, title=f'post {i}')
+
+    def titles(self, response):
+        return [post['title'] for post in response.data['results']]
+
+    def test_pages_are_stable_while_new_posts_arrive(self):
+        first = self.client.get('/api/posts/?cursor=')
+        self.assertNotIn('count', first.data)
+        self.assertEqual(self.titles(first), [f'post {i}' for i in range(14, 4, -1)])
+        Post.objects.create(owner=self.adam, title='a new post')
+        second = self.client.get(first.data['next'])
+        self.assertEqual(self.titles(second), [f'post {i}' for i in range(4, -1, -1)])
+        self.assertIsNone(second.data['next'])
+
+    def test_keyset_pages_dont_count_or_offset(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get('/api/posts/?cursor=')
+        for query in context.captured_queries:
+            sql = query['sql'].upper()
+            self.assertNotIn('OFFSET', sql)
+            # the ETag's aggregates only cover the page's own rows
+            if 'COUNT(' in sql:
+                self.assertIn('LIMIT', sql)
+
+    def test_ordering_by_a_counter_uses_the_id_as_tiebreaker(self):
+        liked = Post.objects.get(title='post 3')
+        Like.objects.create(owner=self.adam, post=liked)
+        first = self.client.get('/api/posts/?ordering=-likes_count&cursor=')
+        second = self.client.get(first.data['next'])
+        titles = self.titles(first) + self.titles(second)
+        self.assertEqual(titles[0], 'post 3')
+        self.assertEqual(len(set(titles)), 15)
+
+    def test_ordering_across_a_relation_is_rejected(self):
+        response = self.client.get('/api/posts/?ordering=likes__created_at&cursor=')
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get('/api/posts/?cursor=nonsense')
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_numbers_still_work_without_a_cursor(self):
+        response = self.client.get('/api/posts/?page=2')
+        self.assertEqual(response.data['count'], 15)
+        self.assertEqual(len(response.data['results']), 5)
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.brian = User.objects.create_user(username='brian', password='pass')
+        self.post = Post.objects.create(owner=self.adam, title='a title')
+        self.comment = Comment.objects.create(
+            owner=self.adam, post=self.post, content='c'
+        )
+        self.client.login(username='brian', password='pass')
+
+    def revalidate(self, url):
+        etag = self.client.get(url)['ETag']
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_responses_are_not_modified(self):
+        for url in [
+            '/api/posts/',
+            '/api/posts/?cursor=',
+            f'/api/posts/{self.post.id}/',
+            '/api/profiles/',
+            f'/api/profiles/{self.adam.profile.id}/',
+            f'/api/comments/?post={self.post.id}',
+            f'/api/comments/{self.comment.id}/',
+        ]:
+            response = self.revalidate(url)
+            self.assertEqual(response.status_code, 304, url)
+            self.assertFalse(response.content, url)
+
+    def test_not_modified_skips_the_serializer(self):
+        etag = self.client.get('/api/posts/')['ETag']
+        # session, user and the ETag's two aggregates
+        with self.assertNumQueries(4):
+            self.client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag)
+
+    def test_changes_give_a_new_etag(self):
+        list_etag = self.client.get('/api/posts/')['ETag']
+        detail_etag = self.client.get(f'/api/posts/{self.post.id}/')['ETag']
+        Like.objects.create(owner=self.adam, post=self.post)
+        self.assertEqual(self.client.get(
+            '/api/posts/', HTTP_IF_NONE_MATCH=list_etag
+        ).status_code, 200)
+        self.assertEqual(self.client.get(
+            f'/api/posts/{self.post.id}/', HTTP_IF_NONE_MATCH=detail_etag
+        ).status_code, 200)
+
+    def test_counter_changes_that_cancel_out_give_a_new_etag(self):
+        first = Post.objects.create(owner=self.adam, title='first')
+        other = User.objects.create_user(username='carl', password='pass')
+        Like.objects.create(owner=other, post=self.post)
+        Comment.objects.create(owner=other, post=self.post, content='c')
+        etag = self.client.get('/api/posts/')['ETag']
+        # one row loses what another gains, keeping the totals
+        Like.objects.get(owner=other).delete()
+        Like.objects.create(owner=self.adam, post=first)
+        Comment.objects.get(owner=other).delete()
+        Comment.objects.create(owner=self.adam, post=first, content='c')
+        response = self.client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        Follower.objects.create(owner=other, followed=self.adam)
+        etag = self.client.get('/api/profiles/')['ETag']
+        Follower.objects.get(owner=other).delete()
+        Follower.objects.create(owner=self.adam, followed=other)
+        response = self.client.get('/api/profiles/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_renaming_the_owner_gives_a_new_etag(self):
+        urls = ['/api/posts/', '/api/profiles/', f'/api/comments/?post={self.post.id}']
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        updated_at = self.adam.profile.updated_at
+        self.adam.username = 'adam2'
+        self.adam.save()
+        for url in urls:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertEqual(response.status_code, 200, url)
+            self.assertIn('adam2', response.content.decode(), url)
+        # the profile itself didn't change
+        self.adam.profile.refresh_from_db()
+        self.assertEqual(self.adam.profile.updated_at, updated_at)
+
+    def test_likes_and_comments_elsewhere_keep_the_etag(self):
+        url = f'/api/posts/?owner__profile={self.brian.profile.id}'
+        Post.objects.create(owner=self.brian, title='another title')
+        etag = self.client.get(url)['ETag']
+        other = User.objects.create_user(username='carl', password='pass')
+        Like.objects.create(owner=other, post=self.post)
+        Comment.objects.create(owner=other, post=self.post, content='c')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etags_depend_on_the_viewer(self):
+        etag = self.client.get('/api/posts/')['ETag']
+        Like.objects.create(owner=self.brian, post=self.post)
+        response = self.client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.client.login(username='adam', password='pass')
+        response = self.client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.token = str(AccessToken.for_user(self.adam))
+        self.factory = APIRequestFactory()
+
+    def authenticate(self, token=None):
+        request = self.factory.get('/')
+        request.COOKIES['my-app-auth'] = token or self.token
+        return CachedJWTCookieAuthentication().authenticate(request)
+
+    def test_verified_tokens_are_cached(self):
+        user, _ = self.authenticate()
+        with self.assertNumQueries(0):
+            cached_user, token = self.authenticate()
+        self.assertEqual(cached_user.pk, self.adam.pk)
+        self.assertEqual(cached_user.username, 'adam')
+        self.assertIsNot(cached_user, user)
+        self.assertEqual(token['user_id'], self.adam.pk)
+
+    def test_saving_the_user_drops_the_entry(self):
+        self.authenticate()
+        self.adam.set_password('new password')
+        self.adam.save()
+        with self.assertNumQueries(1):
+            user, _ = self.authenticate()
+        self.assertTrue(user.check_password('new password'))
+
+    def test_logout_revokes_the_token(self):
+        self.authenticate()
+        self.client.cookies['my-app-auth'] = self.token
+        self.client.post('/api/dj-rest-auth/logout/')
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+        token_cache.clear()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_revocations_by_other_processes_apply_to_cached_tokens(self):
+        self.authenticate()
+        cache.set(revoked_key(token_signature(self.token)), True)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_user_changes_by_other_processes_drop_cached_tokens(self):
+        self.authenticate()
+        User.objects.filter(pk=self.adam.pk).update(username='adam2')
+        bump_user_version(self.adam.pk)
+        with self.assertNumQueries(1):
+            user, _ = self.authenticate()
+        self.assertEqual(user.username, 'adam2')
+        with self.assertNumQueries(0):
+            self.authenticate()
+
+    def test_entries_expire(self):
+        with self.settings(JWT_AUTH_CACHE_TTL=0):
+            self.authenticate()
+            with self.assertNumQueries(1):
+                self.authenticate()
+
+    def test_cache_is_bounded(self):
+        with self.settings(JWT_AUTH_CACHE_SIZE=1):
+            self.authenticate()
+            other = User.objects.create_user(username='brian', password='pass')
+            self.authenticate(str(AccessToken.for_user(other)))
+            with self.assertNumQueries(1):
+                self.authenticate()
+
+
+@override_settings(STATELESS_API=True)
+class StatelessAPIMiddlewareTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        Post.objects.create(owner=self.adam, title='a title')
+
+    def test_api_skips_the_session(self):
+        self.client.login(username='adam', password='pass')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/posts/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(
+            [query for query in queries if 'django_session' in query['sql']]
+        )
+        self.assertNotIn('csrftoken', response.cookies)
+
+    def test_admin_and_login_keep_their_sessions(self):
+        response = self.client.get('/admin/login/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('csrftoken', response.cookies)
+        response = self.client.post(
+            '/api/dj-rest-auth/login/',
+            {'username': 'adam', 'password': 'pass'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('sessionid', response.cookies)
+
+
+class CompressionTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        for i in range(10):
+            Post.objects.create(
+                owner=self.adam, title=f'post {i}', content='some content ' * 10
+            )
+        self.post = Post.objects.first()
+
+    def get(self, url, encoding):
+        return self.client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+
+    def test_gzip(self):
+        plain = self.get('/api/posts/', '')
+        response = self.get('/api/posts/', 'gzip, deflate')
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertIn('Accept-Encoding', response['Vary'])
+        # the weak ETag still validates
+        response = self.client.get(
+            '/api/posts/', HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    @skipUnless(compression.brotli, 'Brotli is not installed')
+    def test_brotli_is_preferred(self):
+        plain = self.get('/api/posts/', '')
+        response = self.get('/api/posts/', 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(
+            compression.brotli.decompress(response.content), plain.content
+        )
+        response = self.get('/api/posts/', 'gzip, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_small_and_html_responses_are_left_alone(self):
+        response = self.get(f'/api/posts/{self.post.id}/?fields=id', 'gzip')
+        self.assertNotIn('Content-Encoding', response)
+        response = self.client.get(
+            '/api/posts/', HTTP_ACCEPT='text/html', HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_shared_responses_are_compressed_once(self):
+        with mock.patch.object(
+            compression, 'compress', wraps=compression.compress
+        ) as compress:
+            for url in ['/api/posts/', f'/api/posts/{self.post.id}/']:
+                first = self.get(url, 'gzip')
+                second = self.get(url, 'gzip')
+                self.assertEqual(first.content, second.content)
+            self.assertEqual(compress.call_count, 2)
+            # logged in list pages differ per user
+            self.client.login(username='adam', password='pass')
+            self.get('/api/posts/', 'gzip')
+            self.get('/api/posts/', 'gzip')
+            self.assertEqual(compress.call_count, 4)
+
+
+class JSONRendererTests(APITestCase):
+    def test_matches_drf_byte_for_byte(self):
+        cache.clear()
+        adam = User.objects.create_user(username='adam', password='pass')
+        post = Post.objects.create(
+            owner=adam, title='caf\u00e9 \u2028 \U0001f600',
+            content='line\nbreak "quoted" \\ \x00\x1f\x7f \u2029 </script>',
+        )
+        Comment.objects.create(owner=adam, post=post, content='c')
+        self.client.login(username='adam', password='pass')
+        payloads = [
+            self.client.get('/api/posts/').data,
+            self.client.get(f'/api/posts/{post.id}/').data,
+            self.client.get(f'/api/comments/?post={post.id}').data,
+            OrderedDict([
+                ('lazy', gettext_lazy('now')), ('decimal', Decimal('1.50')),
+                ('date', date(2024, 2, 29)),
+                ('datetime', datetime(2024, 2, 29, 12, 0, 0, 123456, dt_timezone.utc)),
+                ('int keys', {1: 'one'}), ('tuple', (1, 2)), ('big', 2 ** 70),
+                ('empty', []), ('none', None), ('bool', True),
+            ]),
+        ]
+        for data in payloads:
+            self.assertEqual(
+                JSONRenderer().render(data), renderers.JSONRenderer().render(data)
+            )
+        self.assertEqual(
+            JSONRenderer().render(payloads[0], 'application/json; indent=4'),
+            renderers.JSONRenderer().render(payloads[0], 'application/json; indent=4'),
+        )
+        self.assertEqual(JSONRenderer().render(None), b'')
+
+    @skipUnless(api_renderers.orjson, 'orjson is not installed')
+    def test_known_float_differences(self):
+        self.assertEqual(JSONRenderer().render({'a': 1e16}), b'{"a":1e16}')
+        self.assertEqual(renderers.JSONRenderer().render({'a': 1e16}), b'{"a":1e+16}')
+        for value in [float('nan'), float('inf'), float('-inf')]:
+            self.assertEqual(JSONRenderer().render({'a': value}), b'{"a":null}')
+            with self.assertRaises(ValueError):
+                renderers.JSONRenderer().render({'a': value})
+
+    def test_parser(self):
+        body = '{"title": "caf\u00e9", "ids": [1, 2], "nested": {"a": null}}'.encode()
+        self.assertEqual(
+            JSONParser().parse(io.BytesIO(body)),
+            {'title': 'caf\u00e9', 'ids': [1, 2], 'nested': {'a': None}},
+        )
+        for invalid in [b'{"a": NaN}', b'{"a": ']:
+            with self.assertRaises(ParseError):
+                JSONParser().parse(io.BytesIO(invalid))
+
+
+class SparseFieldsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.post = Post.objects.create(owner=self.adam, title='a title')
+        Like.objects.create(owner=self.adam, post=self.post)
+        self.client.login(username='adam', password='pass')
+
+    def page_sql(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        page = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT "posts_post"."id"')
+        ]
+        return response, page[-1]
+
+    def test_fields_and_omit(self):
+        response, sql = self.page_sql('/api/posts/?fields=id,title')
+        self.assertEqual(
+            response.data['results'], [{'id': self.post.id, 'title': 'a title'}]
+        )
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('likes_like', sql)
+
+        response, sql = self.page_sql('/api/posts/?omit=like_id,content')
+        result = response.data['results'][0]
+        self.assertNotIn('like_id', result)
+        self.assertNotIn('content', result)
+        self.assertEqual(result['profile_id'], self.adam.profile.id)
+        self.assertIn('JOIN', sql)
+        self.assertNotIn('likes_like', sql)
+
+    def test_every_view_takes_fields(self):
+        Follower.objects.create(owner=self.adam, followed=self.adam)
+        Comment.objects.create(owner=self.adam, post=self.post, content='c')
+        for url in [
+            '/api/posts/', f'/api/posts/{self.post.id}/',
+            '/api/profiles/', f'/api/profiles/{self.adam.profile.id}/',
+            f'/api/comments/?post={self.post.id}', '/api/likes/',
+            '/api/followers/', '/api/feed/',
+        ]:
+            response = self.client.get(url, {'fields': 'id'})
+            data = response.data.get('results', [response.data])
+            self.assertEqual(list(data[0]), ['id'], url)
+
+    def test_cached_detail_views_skip_viewer_field_queries(self):
+        url = f'/api/profiles/{self.adam.profile.id}/'
+        self.client.get(url)
+        # session and user
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'omit': 'following_id'})
+        self.assertNotIn('following_id', response.data)
+        self.assertEqual(response.data['owner'], 'adam')
+
+    def test_unknown_fields(self):
+        response = self.client.get('/api/posts/', {'fields': 'id,nope'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0', 'replica_1'])
+class ReplicaRoutingTests(APITestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.routed = {}
+
+        def get_response(request):
+            self.routed = {
+                'post': router.db_for_read(Post),
+                'user': router.db_for_read(User),
+                'post_write': router.db_for_write(Post),
+            }
+            with use_primary():
+                self.routed['pinned'] = router.db_for_read(Post)
+            return HttpResponse()
+
+        self.middleware = ReplicaRoutingMiddleware(get_response)
+
+    def test_reads_go_to_a_replica(self):
+        self.middleware(self.factory.get('/api/posts/'))
+        self.assertIn(self.routed['post'], ['replica_0', 'replica_1'])
+        self.assertEqual(self.routed['user'], 'default')
+        self.assertEqual(self.routed['post_write'], 'default')
+        self.assertEqual(self.routed['pinned'], 'default')
+        # outside a request
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        response = self.middleware(self.factory.post('/api/posts/'))
+        self.assertEqual(self.routed['post'], 'default')
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 10)
+
+        request = self.factory.get('/api/posts/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        response = self.middleware(request)
+        self.assertEqual(self.routed['post'], 'default')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_no_replicas(self):
+        with self.settings(DATABASE_REPLICAS=[]):
+            response = self.middleware(self.factory.post('/api/posts/'))
+            self.assertNotIn(PIN_COOKIE, response.cookies)
+            self.middleware(self.factory.get('/api/posts/'))
+        self.assertEqual(self.routed['post'], 'default')
+
+
+@skipUnless('replica_test' in settings.DATABASES, 'needs the replica_test alias')
+@override_settings(DATABASE_REPLICAS=['replica_test'])
+class ReplicaQueryTests(APITransactionTestCase):
+    """
+    Requests against a real second connection, mirroring default.
+    """
+    databases = {'default', 'replica_test'}
+
+    def setUp(self):
+        cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        Post.objects.create(owner=self.adam, title='a title')
+
+    def get_posts(self, count=1):
+        """
+        GET /api/posts/, returning the aliases that read posts.
+        """
+        aliases = set()
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica_test']) as replica:
+            response = self.client.get('/api/posts/')
+        self.assertEqual(response.data['count'], count)
+        for alias, queries in [('default', primary), ('replica_test', replica)]:
+            if any('"posts_post"' in query['sql'] for query in queries):
+                aliases.add(alias)
+        return aliases
+
+    def test_gets_read_from_the_replica(self):
+        self.assertEqual(self.get_posts(), {'replica_test'})
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        self.client.login(username='adam', password='pass')
+        response = self.client.post('/api/posts/', {'title': 'another'})
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(self.get_posts(count=2), {'default'})
+        self.client.cookies.pop(PIN_COOKIE)
+        self.assertEqual(self.get_posts(count=2), {'replica_test'})
+
+
+class ThreadNameView(APIView):
+    def get(self, request):
+        return Response(threading.current_thread().name)
+
+    def post(self, request):
+        return Response(threading.current_thread().name)
+
+
+# a transaction test case, as the pool's threads
+# have their own connections and only see committed rows
+@override_settings(ASGI_MODE=True)
+class AsyncReadViewTests(APITransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        adam = User.objects.create_user(username='adam', password='pass')
+        Post.objects.create(owner=adam, title='a title')
+        self.factory = APIRequestFactory()
+
+    def test_reads_run_on_the_thread_pool(self):
+        view = read_view(ThreadNameView)
+        response = async_to_sync(view)(self.factory.get('/'))
+        self.assertTrue(response.data.startswith('async-read'))
+        response = async_to_sync(view)(self.factory.post('/'))
+        self.assertFalse(response.data.startswith('async-read'))
+
+    def test_post_list(self):
+        response = async_to_sync(read_view(PostList))(
+            self.factory.get('/api/posts/')
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['title'], 'a title')
+
+    def test_sync_views_without_asgi_mode(self):
+        self.assertTrue(asyncio.iscoroutinefunction(read_view(PostList)))
+        with self.settings(ASGI_MODE=False):
+            self.assertFalse(asyncio.iscoroutinefunction(read_view(PostList)))
+
+
+class BlockingConnectionPoolTests(SimpleTestCase):
+    """
+    The pool's bookkeeping, with psycopg2.connect() faked so it runs
+    without a PostgreSQL server.
+    """
+    def make_pool(self, max_size, timeout):
+        from .db.postgresql.base import BlockingConnectionPool
+
+        def connect(*args, **kwargs):
+            conn = mock.Mock(closed=False)
+            conn.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+            return conn
+
+        patcher = mock.patch('psycopg2.connect', side_effect=connect)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return BlockingConnectionPool(1, max_size, timeout)
+
+    def test_exhausted_pool_fails_after_the_timeout(self):
+        pool = self.make_pool(max_size=1, timeout=0.05)
+        pool.getconn()
+        with self.assertRaises(psycopg2.OperationalError):
+            pool.getconn()
+
+    def test_exhausted_pool_waits_for_a_connection(self):
+        pool = self.make_pool(max_size=1, timeout=5)
+        conn = pool.getconn()
+        timer = threading.Timer(0.05, pool.putconn, [conn])
+        timer.start()
+        self.assertIs(pool.getconn(), conn)
+        timer.join()
+
+    def test_exhaustion_is_a_django_database_error(self):
+        pool = self.make_pool(max_size=1, timeout=0.05)
+        pool.getconn()
+        wrapper = load_backend('drf_api.db.postgresql').DatabaseWrapper({
+            **connection.settings_dict,
+            'ENGINE': 'drf_api.db.postgresql', 'NAME': 'pool_test',
+            'OPTIONS': {'pool': {'max_size': 1}},
+        }, alias='pool_test')
+        with mock.patch(
+            'drf_api.db.postgresql.base.get_pool', return_value=pool
+        ), self.assertRaises(OperationalError):
+            wrapper.ensure_connection()
+
+
+@skipUnless(connection.vendor == 'postgresql', 'needs PostgreSQL')
+class PostgresConnectionTests(APITransactionTestCase):
+    def make_connection(self, **settings):
+        settings_dict = {**connection.settings_dict, **settings}
+        wrapper = load_backend('drf_api.db.postgresql').DatabaseWrapper(
+            settings_dict, alias='pool_test'
+        )
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_pooled_connections_are_reused(self):
+        wrapper = self.make_connection(
+            CONN_MAX_AGE=0, OPTIONS={'pool': {'max_size': 2}}
+        )
+        wrapper.ensure_connection()
+        first = wrapper.connection
+        wrapper.close()
+        wrapper.ensure_connection()
+        self.assertIs(wrapper.connection, first)
+
+    def test_dropped_connections_fail_the_health_check(self):
+        wrapper = self.make_connection(CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=True)
+        wrapper.ensure_connection()
+        dropped = wrapper.connection
+        dropped.close()
+        # a new request
+        wrapper.close_if_unusable_or_obsolete()
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        self.assertIsNot(wrapper.connection, dropped)
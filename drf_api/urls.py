@@ -33,6 +33,7 @@ urlpatterns = [
     path('api/', include('comments.urls')),
     path('api/', include('likes.urls')),
     path('api/', include('followers.urls')),
+    path('api/', include('feed.urls')),
 ]
 
 handler404 = TemplateView.as_view(template_name='index.html')
\ No newline at end of file
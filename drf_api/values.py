@@ -0,0 +1,112 @@
+"""
+Read-only serialization of list pages straight from .values() rows.
+
+Model serializers build a model instance per row, and then a DRF field
+per column and row, which is most of the time a list GET spends in
+Python. A ValuesSerializer reads the columns its output needs with
+.values() instead, joins included, and builds each item's dict itself,
+with the same keys, order and values as the model serializer it
+stands in for. ValuesListMixin uses it for a view's GET lists.
+"""
+from django.core.files.storage import default_storage
+from rest_framework import serializers
+from rest_framework.response import Response
+
+
+class ValuesSerializer:
+    """
+    Renders rows of queryset.values(*get_columns(queryset)) as the
+    view's model serializer renders the instances.
+
+    Subclasses list the columns they read, plus the annotations a view
+    may add, e.g. like_id, which are only read when the queryset has
+    them, and build each item in to_representation().
+    """
+    columns = ()
+    annotations = ()
+
+    def __init__(self, context):
+        self.context = context
+        self.request = context['request']
+        self.user = self.request.user
+        self.datetime_field = serializers.DateTimeField()
+        # storage URLs per (field, name), as a page shows the same
+        # avatars many times over
+        self.urls = {}
+
+    def get_columns(self, queryset):
+        return list(self.columns) + [
+            name for name in self.annotations
+            if name in queryset.query.annotations
+        ]
+
+    def file_url(self, field, name):
+        """
+        field's FieldFile url for the file name, as in source='image.url'.
+        """
+        key = (field, name)
+        try:
+            return self.urls[key]
+        except KeyError:
+            pass
+        url = self.urls[key] = field.attr_class(None, field, name).url
+        return url
+
+    def storage_url(self, name):
+        """
+        default_storage.url(), e.g. for image variants.
+        """
+        key = (None, name)
+        try:
+            return self.urls[key]
+        except KeyError:
+            pass
+        url = self.urls[key] = default_storage.url(name)
+        return url
+
+    def image_url(self, field, name):
+        """
+        The URL DRF's FileField and ImageField render for the file name.
+        """
+        if not name:
+            return None
+        return self.request.build_absolute_uri(self.file_url(field, name))
+
+    def datetime(self, value):
+        return self.datetime_field.to_representation(value)
+
+    def is_owner(self, owner_id):
+        return self.user.pk == owner_id
+
+    def to_representation(self, row):
+        raise NotImplementedError
+
+    def serialize(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+class ValuesListMixin:
+    """
+    Mixin for list views answering GETs through values_serializer_class.
+
+    Sparse fieldsets fall back to the serializer_class, as they trim
+    the query and the rendering already.
+    """
+    values_serializer_class = None
+
+    def use_values_serializer(self):
+        if self.values_serializer_class is None:
+            return False
+        get_field_names = getattr(self, 'get_field_names', None)
+        return get_field_names is None or get_field_names() is None
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_values_serializer():
+            return super().list(request, *args, **kwargs)
+        serializer = self.values_serializer_class(self.get_serializer_context())
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.values(*serializer.get_columns(queryset))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+        return Response(serializer.serialize(queryset))
@@ -1,5 +1,6 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
+from .authentication import revoke_token
 from .settings import (
     JWT_AUTH_COOKIE, JWT_AUTH_REFRESH_COOKIE, JWT_AUTH_SAMESITE,
     JWT_AUTH_SECURE,
@@ -14,6 +15,9 @@ def root_route(request):
 # dj-rest-auth logout view fix
 @api_view(['POST'])
 def logout_route(request):
+    raw_token = request.COOKIES.get(JWT_AUTH_COOKIE)
+    if raw_token:
+        revoke_token(raw_token)
     response = Response()
     response.set_cookie(
         key=JWT_AUTH_COOKIE,
@@ -0,0 +1,59 @@
+# Generated by Django 3.2.23 on 2026-10-18 03:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_feeds(apps, schema_editor):
+    Follower = apps.get_model('followers', 'Follower')
+    Post = apps.get_model('posts', 'Post')
+    FeedEntry = apps.get_model('feed', 'FeedEntry')
+    followers = {}
+    for owner_id, followed_id in Follower.objects.values_list(
+        'owner_id', 'followed_id'
+    ):
+        followers.setdefault(followed_id, []).append(owner_id)
+    entries = [
+        FeedEntry(owner_id=owner_id, post_id=post_id, created_at=created_at)
+        for post_id, author_id, created_at in Post.objects.filter(
+            owner_id__in=followers
+        ).values_list('id', 'owner_id', 'created_at')
+        for owner_id in followers[author_id]
+    ]
+    FeedEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0004_indexes'),
+        ('followers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='posts.post')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['owner', '-created_at'], name='feedentry_owner_created_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='feedentry',
+            unique_together={('owner', 'post')},
+        ),
+        migrations.RunPython(backfill_feeds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,107 @@
+from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.contrib.auth.models import User
+from drf_api.signals import bulk_created, bulk_deleted
+from followers.models import Follower
+from posts.models import Post
+
+
+class FeedEntry(models.Model):
+    """
+    FeedEntry model, a post in the home feed of 'owner'.
+    There is one entry per post by each user 'owner' follows, written when
+    the post is created and backfilled or pruned on follow and unfollow,
+    so reading the feed doesn't need to join through the followers.
+    'created_at' is the post's creation time, so the feed is read in
+    order straight from the (owner, created_at) index.
+    """
+    owner = models.ForeignKey(
+        User, related_name='feed_entries', on_delete=models.CASCADE
+    )
+    post = models.ForeignKey(
+        Post, related_name='feed_entries', on_delete=models.CASCADE
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at']
+        unique_together = ['owner', 'post']
+        indexes = [
+            models.Index(
+                fields=['owner', '-created_at'], name='feedentry_owner_created_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.owner} {self.post}'
+
+
+def fan_out(post):
+    """
+    Add a new post to the feed of everyone following its owner.
+    """
+    FeedEntry.objects.bulk_create([
+        FeedEntry(owner_id=owner_id, post=post, created_at=post.created_at)
+        for owner_id in Follower.objects.filter(
+            followed_id=post.owner_id
+        ).values_list('owner_id', flat=True)
+    ], batch_size=1000, ignore_conflicts=True)
+
+
+def backfill(owner_id, followed_ids):
+    """
+    Add the posts of newly followed users to the follower's feed.
+    """
+    FeedEntry.objects.bulk_create([
+        FeedEntry(owner_id=owner_id, post_id=post_id, created_at=created_at)
+        for post_id, created_at in Post.objects.filter(
+            owner_id__in=followed_ids
+        ).values_list('id', 'created_at')
+    ], batch_size=1000, ignore_conflicts=True)
+
+
+def prune(owner_id, followed_ids):
+    """
+    Remove the posts of unfollowed users from the follower's feed.
+    """
+    FeedEntry.objects.filter(
+        owner_id=owner_id, post__owner_id__in=followed_ids
+    ).delete()
+
+
+def followed_by_owner(followers):
+    followed = {}
+    for follower in followers:
+        followed.setdefault(follower.owner_id, []).append(follower.followed_id)
+    return followed.items()
+
+
+def post_created(sender, instance, created, **kwargs):
+    if created:
+        fan_out(instance)
+
+
+def follower_created(sender, instance, created, **kwargs):
+    if created:
+        backfill(instance.owner_id, [instance.followed_id])
+
+
+def follower_deleted(sender, instance, **kwargs):
+    prune(instance.owner_id, [instance.followed_id])
+
+
+def followers_created(sender, instances, **kwargs):
+    for owner_id, followed_ids in followed_by_owner(instances):
+        backfill(owner_id, followed_ids)
+
+
+def followers_deleted(sender, instances, **kwargs):
+    for owner_id, followed_ids in followed_by_owner(instances):
+        prune(owner_id, followed_ids)
+
+
+post_save.connect(post_created, sender=Post)
+post_save.connect(follower_created, sender=Follower)
+post_delete.connect(follower_deleted, sender=Follower)
+bulk_created.connect(followers_created, sender=Follower)
+bulk_deleted.connect(followers_deleted, sender=Follower)
@@ -0,0 +1,46 @@
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.test import APITestCase
+from drf_api.test_utils import QueryCountMixin
+from followers.models import Follower
+from likes.models import Like
+from posts.models import Post
+from .models import FeedEntry
+
+
+class FeedListViewTests(QueryCountMixin, APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.brian = User.objects.create_user(username='brian', password='pass')
+        self.old_post = Post.objects.create(owner=self.brian, title='old post')
+
+    def titles(self):
+        response = self.client.get('/api/feed/')
+        return [post['title'] for post in response.data['results']]
+
+    def test_following_backfills_and_new_posts_fan_out(self):
+        Follower.objects.create(owner=self.adam, followed=self.brian)
+        Post.objects.create(owner=self.brian, title='new post')
+        Post.objects.create(owner=self.adam, title='own post')
+        self.client.login(username='adam', password='pass')
+        self.assertEqual(self.titles(), ['new post', 'old post'])
+
+    def test_unfollowing_prunes_the_feed(self):
+        follower = Follower.objects.create(owner=self.adam, followed=self.brian)
+        follower.delete()
+        self.assertFalse(FeedEntry.objects.filter(owner=self.adam).exists())
+
+    def test_feed_includes_like_id_with_a_fixed_query_count(self):
+        Follower.objects.create(owner=self.adam, followed=self.brian)
+        like = Like.objects.create(owner=self.adam, post=self.old_post)
+        self.client.login(username='adam', password='pass')
+        response = self.client.get('/api/feed/')
+        self.assertEqual(response.data['results'][0]['like_id'], like.id)
+        self.assertQueryCountIndependentOfPageSize(
+            '/api/feed/',
+            lambda i: Post.objects.create(owner=self.brian, title=f'post {i}')
+        )
+
+    def test_feed_requires_login(self):
+        response = self.client.get('/api/feed/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
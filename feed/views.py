@@ -0,0 +1,49 @@
+from django.db.models import OuterRef, Subquery
+from rest_framework import generics, permissions
+from drf_api.sparse import SparseFieldsViewMixin
+from likes.models import Like
+from posts.serializers import PostSerializer
+from .models import FeedEntry
+
+
+class FeedList(SparseFieldsViewMixin, generics.ListAPIView):
+    """
+    List the posts of the users the logged in user follows, newest first.
+    Reads the precomputed feed entries and their posts only, instead of
+    filtering every post through the owner's followers.
+    Pages are taken over the entries, so ?cursor= keyset pagination
+    works here too.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = PostSerializer
+
+    def get_queryset(self):
+        user = self.request.user
+        related = ['post__owner__profile']
+        if self.get_field_names() is not None:
+            related = ['post'] + [
+                f'post__{path}' for path in self.get_related_paths()
+            ]
+        queryset = FeedEntry.objects.filter(owner=user).select_related(
+            *related
+        ).order_by('-created_at')
+        if not self.wants('like_id'):
+            return queryset
+        return queryset.annotate(
+            like_id=Subquery(
+                Like.objects.filter(
+                    owner=user, post=OuterRef('post')
+                ).values('id')[:1]
+            )
+        )
+
+    def list(self, request, *args, **kwargs):
+        entries = self.paginate_queryset(self.get_queryset())
+        posts = []
+        for entry in entries:
+            # hand the annotation over so PostSerializer doesn't query for it
+            if hasattr(entry, 'like_id'):
+                entry.post.like_id = entry.like_id
+            posts.append(entry.post)
+        serializer = self.get_serializer(posts, many=True)
+        return self.get_paginated_response(serializer.data)
@@ -1,8 +1,11 @@
 from django.db import models
 from django.contrib.auth.models import User
+from drf_api.cache import cache_dependency
+from drf_api.counters import CounterMixin, track
+from profiles.models import Profile
 
 
-class Follower(models.Model):
+class Follower(CounterMixin, models.Model):
     """
     Follower model, related to 'owner' and 'followed'.
     'owner' is a User that is following a User.
@@ -22,6 +25,24 @@ class Follower(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ['owner', 'followed']
+        indexes = [
+            # the unique (owner, followed) index serves following_id lookups,
+            # this one serves a user's followers, most recent first
+            models.Index(
+                fields=['followed', '-created_at'],
+                name='follower_followed_created_idx',
+            ),
+        ]
 
     def __str__(self):
-        return f'{self.owner} {self.followed}'
\ No newline at end of file
+        return f'{self.owner} {self.followed}'
+
+
+track(Follower, 'followed', Profile, 'followers_count', target_field='owner')
+track(Follower, 'owner', Profile, 'following_count', target_field='owner')
+cache_dependency(
+    Follower,
+    profile=lambda follower: Profile.objects.filter(
+        owner_id__in=[follower.owner_id, follower.followed_id]
+    ).values_list('id', flat=True),
+)
@@ -1,9 +1,10 @@
 from django.db import IntegrityError
 from rest_framework import serializers
+from drf_api.sparse import SparseFieldsMixin
 from .models import Follower
 
 
-class FollowerSerializer(serializers.ModelSerializer):
+class FollowerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Follower model
     Create method handles the unique constraint on 'owner' and 'followed'
@@ -1,3 +1,57 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
+from feed.models import FeedEntry
+from posts.models import Post
+from profiles.models import Profile
+from .models import Follower
 
-# Create your tests here.
+
+class FollowerBulkViewTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.others = [
+            User.objects.create_user(username=name, password='pass')
+            for name in ['brian', 'carol']
+        ]
+        for user in self.others:
+            Post.objects.create(owner=user, title=f'post by {user}')
+        self.client.login(username='adam', password='pass')
+        self.ids = [user.id for user in self.others]
+
+    def test_bulk_follow_updates_counts_and_feed(self):
+        response = self.client.post(
+            '/api/followers/bulk/', {'followed': self.ids}, format='json'
+        )
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['created', 'created'],
+        )
+        self.assertEqual(Profile.objects.get(owner=self.adam).following_count, 2)
+        for user in self.others:
+            self.assertEqual(Profile.objects.get(owner=user).followers_count, 1)
+        self.assertEqual(FeedEntry.objects.filter(owner=self.adam).count(), 2)
+
+    def test_bulk_unfollow_updates_counts_and_feed(self):
+        for user in self.others:
+            Follower.objects.create(owner=self.adam, followed=user)
+        response = self.client.delete(
+            '/api/followers/bulk/', {'followed': self.ids[:1]}, format='json'
+        )
+        self.assertEqual(response.data['results'][0]['status'], 'deleted')
+        self.assertEqual(Profile.objects.get(owner=self.adam).following_count, 1)
+        self.assertEqual(Profile.objects.get(owner=self.others[0]).followers_count, 0)
+        self.assertEqual(
+            list(FeedEntry.objects.filter(owner=self.adam).values_list(
+                'post__owner', flat=True
+            )),
+            [self.others[1].id],
+        )
+
+    def test_cached_profiles_are_invalidated(self):
+        profile = Profile.objects.get(owner=self.others[0])
+        url = f'/api/profiles/{profile.id}/'
+        self.assertEqual(self.client.get(url).data['followers_count'], 0)
+        self.client.post(
+            '/api/followers/bulk/', {'followed': self.ids}, format='json'
+        )
+        self.assertEqual(self.client.get(url).data['followers_count'], 1)
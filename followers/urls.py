@@ -4,4 +4,5 @@ from followers import views
 urlpatterns = [
     path('followers/', views.FollowerList.as_view()),
     path('followers/<int:pk>/', views.FollowerDetail.as_view()),
+    path('followers/bulk/', views.FollowerBulk.as_view()),
 ]
\ No newline at end of file
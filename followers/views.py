@@ -1,10 +1,12 @@
 from rest_framework import generics, permissions
+from drf_api.bulk import BulkOwnedView
 from drf_api.permissions import IsOwnerOrReadOnly
+from drf_api.sparse import SparseFieldsViewMixin
 from .models import Follower
 from .serializers import FollowerSerializer
 
 
-class FollowerList(generics.ListCreateAPIView):
+class FollowerList(SparseFieldsViewMixin, generics.ListCreateAPIView):
     """
     List all followers, i.e. all instances of a user
     following another user'.
@@ -12,19 +14,29 @@ class FollowerList(generics.ListCreateAPIView):
     Perform_create: associate the current logged in user with a follower.
     """
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    queryset = Follower.objects.all()
+    queryset = Follower.objects.select_related('owner', 'followed')
     serializer_class = FollowerSerializer
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
 
-class FollowerDetail(generics.RetrieveDestroyAPIView):
+class FollowerDetail(SparseFieldsViewMixin, generics.RetrieveDestroyAPIView):
     """
     Retrieve a follower
     No Update view, as we either follow or unfollow users
     Destroy a follower, i.e. unfollow someone if owner
     """
     permission_classes = [IsOwnerOrReadOnly]
-    queryset = Follower.objects.all()
-    serializer_class = FollowerSerializer
\ No newline at end of file
+    queryset = Follower.objects.select_related('owner', 'followed')
+    serializer_class = FollowerSerializer
+
+
+class FollowerBulk(BulkOwnedView):
+    """
+    Follow (POST) or unfollow (DELETE) several users at once,
+    e.g. {"followed": [1, 2, 3]}, as in onboarding's suggested accounts
+    """
+    model = Follower
+    target_field = 'followed'
+    items_field = 'followed'
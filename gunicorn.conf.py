@@ -0,0 +1,19 @@
+"""
+Gunicorn settings for the Procfile's web process.
+
+By default the WSGI application runs on sync workers. Setting ASGI
+switches to the ASGI application on uvicorn workers, where the post,
+profile and comment views serve reads concurrently, see
+drf_api/async_views.py. WEB_CONCURRENCY sets the number of workers
+either way.
+"""
+import os
+
+if 'ASGI' in os.environ:
+    wsgi_app = 'drf_api.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'drf_api.wsgi:application'
+    worker_class = 'sync'
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
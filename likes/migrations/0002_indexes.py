@@ -0,0 +1,17 @@
+# Generated by Django 3.2.23 on 2026-10-18 03:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('likes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='like',
+            index=models.Index(fields=['owner', '-created_at'], name='like_owner_created_idx'),
+        ),
+    ]
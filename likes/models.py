@@ -1,9 +1,11 @@
 from django.db import models
 from django.contrib.auth.models import User
+from drf_api.cache import cache_dependency
+from drf_api.counters import CounterMixin, track
 from posts.models import Post
 
 
-class Like(models.Model):
+class Like(CounterMixin, models.Model):
     """
     Like model, related to 'owner' and 'post'.
     'owner' is a User instance and 'post' is a Post instance.
@@ -18,6 +20,17 @@ class Like(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ['owner', 'post']
+        indexes = [
+            # the unique (owner, post) index serves like_id lookups, this one
+            # serves the posts a user liked, most recent like first
+            models.Index(
+                fields=['owner', '-created_at'], name='like_owner_created_idx'
+            ),
+        ]
 
     def __str__(self):
-        return f'{self.owner} {self.post}'
\ No newline at end of file
+        return f'{self.owner} {self.post}'
+
+
+track(Like, 'post', Post, 'likes_count')
+cache_dependency(Like, post=lambda like: [like.post_id])
@@ -1,9 +1,10 @@
 from django.db import IntegrityError
 from rest_framework import serializers
+from drf_api.sparse import SparseFieldsMixin
 from likes.models import Like
 
 
-class LikeSerializer(serializers.ModelSerializer):
+class LikeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Like model
     The create method handles the unique constraint on 'owner' and 'post'
@@ -1,3 +1,92 @@
-from django.test import TestCase
+from unittest import mock
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete
+from rest_framework import status
+from rest_framework.test import APITestCase
+from drf_api.bulk import delete_rows
+from posts.models import Post
+from .models import Like
 
-# Create your tests here.
+
+class LikeBulkViewTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.posts = [
+            Post.objects.create(owner=self.adam, title=f'post {i}')
+            for i in range(3)
+        ]
+        self.client.login(username='adam', password='pass')
+
+    def likes_counts(self):
+        return [
+            Post.objects.get(pk=post.pk).likes_count for post in self.posts
+        ]
+
+    def test_bulk_like_reports_each_post(self):
+        existing = Like.objects.create(owner=self.adam, post=self.posts[0])
+        ids = [post.id for post in self.posts] + [999, self.posts[1].id]
+        response = self.client.post(
+            '/api/likes/bulk/', {'posts': ids}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual(
+            [result['status'] for result in results],
+            ['exists', 'created', 'created', 'not_found'],
+        )
+        self.assertEqual(results[0]['id'], existing.id)
+        self.assertEqual(
+            results[1]['id'],
+            Like.objects.get(owner=self.adam, post=self.posts[1]).id,
+        )
+        self.assertEqual(self.likes_counts(), [1, 1, 1])
+
+    def test_bulk_unlike(self):
+        like = Like.objects.create(owner=self.adam, post=self.posts[0])
+        ids = [self.posts[0].id, self.posts[1].id]
+        # a single DELETE, rather than one per like
+        with self.assertNumQueries(8):
+            response = self.client.delete(
+                '/api/likes/bulk/', {'posts': ids}, format='json'
+            )
+        self.assertEqual(response.data['results'], [
+            {'post': self.posts[0].id, 'status': 'deleted', 'id': like.id},
+            {'post': self.posts[1].id, 'status': 'not_found'},
+        ])
+        self.assertFalse(Like.objects.exists())
+        self.assertEqual(self.likes_counts(), [0, 0, 0])
+
+    def test_bulk_likes_are_validated(self):
+        for data in [{}, {'posts': []}, {'posts': ['a']}, {'posts': list(range(101))}]:
+            response = self.client.post('/api/likes/bulk/', data, format='json')
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST, data
+            )
+
+    def test_bulk_likes_require_login(self):
+        self.client.logout()
+        response = self.client.post(
+            '/api/likes/bulk/', {'posts': [self.posts[0].id]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class DeleteRowsTests(APITestCase):
+    def setUp(self):
+        adam = User.objects.create_user(username='adam', password='pass')
+        self.post = Post.objects.create(owner=adam, title='a title')
+        self.like = Like.objects.create(owner=adam, post=self.post)
+
+    def test_unreferenced_rows_are_deleted_in_one_query_without_signals(self):
+        receiver = mock.Mock()
+        post_delete.connect(receiver, sender=Like)
+        self.addCleanup(post_delete.disconnect, receiver, sender=Like)
+        with self.assertNumQueries(1):
+            deleted = delete_rows(Like.objects.filter(pk=self.like.pk), 'default')
+        self.assertEqual(deleted, 1)
+        self.assertFalse(Like.objects.exists())
+        receiver.assert_not_called()
+
+    def test_referenced_rows_cascade(self):
+        delete_rows(Post.objects.filter(pk=self.post.pk), 'default')
+        self.assertFalse(Like.objects.exists())
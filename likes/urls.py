@@ -4,4 +4,5 @@ from likes import views
 urlpatterns = [
     path('likes/', views.LikeList.as_view()),
     path('likes/<int:pk>/', views.LikeDetail.as_view()),
+    path('likes/bulk/', views.LikeBulk.as_view()),
 ]
\ No newline at end of file
@@ -1,15 +1,17 @@
 from rest_framework import generics, permissions
+from drf_api.bulk import BulkOwnedView
 from drf_api.permissions import IsOwnerOrReadOnly
+from drf_api.sparse import SparseFieldsViewMixin
 from likes.models import Like
 from likes.serializers import LikeSerializer
 
 
 # List and create likes so extend teh ListCreateAPIView generics class
 # we have to make sure only the authenticated users can like posts by setting permission classes
-class LikeList(generics.ListCreateAPIView):
+class LikeList(SparseFieldsViewMixin, generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     serializer_class = LikeSerializer
-    queryset = Like.objects.all()
+    queryset = Like.objects.select_related('owner')
 
     #Just like when we set the user creating a comment as it's owner, we'll do teh same here iwth the Like
     # When saving the like instances to our database, we'll set the owner to be the user making the request
@@ -17,7 +19,17 @@ class LikeList(generics.ListCreateAPIView):
         serializer.save(owner=self.request.user)
 
 
-class LikeDetail(generics.RetrieveDestroyAPIView):
+class LikeDetail(SparseFieldsViewMixin, generics.RetrieveDestroyAPIView):
     permission_classes = [IsOwnerOrReadOnly]
     serializer_class = LikeSerializer
-    queryset = Like.objects.all()
+    queryset = Like.objects.select_related('owner')
+
+
+class LikeBulk(BulkOwnedView):
+    """
+    Like (POST) or unlike (DELETE) several posts at once,
+    e.g. {"posts": [1, 2, 3]}
+    """
+    model = Like
+    target_field = 'post'
+    items_field = 'posts'
@@ -0,0 +1,298 @@
+"""
+Server-side rendering of Post.image_filter.
+
+The frontend applies the filters with CSSgram, i.e. CSS filter functions
+plus colour overlays blended onto the image. Here each filter is folded
+into two vectorized Pillow passes: a 768 entry lookup table doing the
+blends, which all work per channel, and a 3x4 colour matrix doing the
+filter functions, which are all affine. CSSgram's radial gradients are
+approximated by their centre colour.
+
+With settings.RENDER_IMAGE_FILTERS, saving a post whose filtered variants
+are missing renders them in the background, for the current filter only.
+They are kept in Post.image_filtered per filter, so switching back to an
+earlier filter is free, until the image itself changes.
+"""
+import hashlib
+import math
+import os
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from drf_api.images import (
+    READY, VARIANTS, encode, fit, is_default_image, open_source,
+)
+
+
+# CSS filter functions as (3x3 matrix, offset) on 0-1 channel values,
+# see https://www.w3.org/TR/filter-effects-1/#filter-functions
+
+def linear(rows, offset=0):
+    return rows, [offset] * 3
+
+
+def brightness(amount):
+    return linear([[amount, 0, 0], [0, amount, 0], [0, 0, amount]])
+
+
+def contrast(amount):
+    return linear(
+        [[amount, 0, 0], [0, amount, 0], [0, 0, amount]], 0.5 - 0.5 * amount
+    )
+
+
+def grayscale(amount):
+    a = 1 - amount
+    return linear([
+        [0.2126 + 0.7874 * a, 0.7152 - 0.7152 * a, 0.0722 - 0.0722 * a],
+        [0.2126 - 0.2126 * a, 0.7152 + 0.2848 * a, 0.0722 - 0.0722 * a],
+        [0.2126 - 0.2126 * a, 0.7152 - 0.7152 * a, 0.0722 + 0.9278 * a],
+    ])
+
+
+def sepia(amount):
+    a = 1 - amount
+    return linear([
+        [0.393 + 0.607 * a, 0.769 - 0.769 * a, 0.189 - 0.189 * a],
+        [0.349 - 0.349 * a, 0.686 + 0.314 * a, 0.168 - 0.168 * a],
+        [0.272 - 0.272 * a, 0.534 - 0.534 * a, 0.131 + 0.869 * a],
+    ])
+
+
+def saturate(amount):
+    s = amount
+    return linear([
+        [0.213 + 0.787 * s, 0.715 - 0.715 * s, 0.072 - 0.072 * s],
+        [0.213 - 0.213 * s, 0.715 + 0.285 * s, 0.072 - 0.072 * s],
+        [0.213 - 0.213 * s, 0.715 - 0.715 * s, 0.072 + 0.928 * s],
+    ])
+
+
+def hue_rotate(degrees):
+    c, s = math.cos(math.radians(degrees)), math.sin(math.radians(degrees))
+    return linear([
+        [0.213 + c * 0.787 - s * 0.213, 0.715 - c * 0.715 - s * 0.715,
+         0.072 - c * 0.072 + s * 0.928],
+        [0.213 - c * 0.213 + s * 0.143, 0.715 + c * 0.285 + s * 0.140,
+         0.072 - c * 0.072 - s * 0.283],
+        [0.213 - c * 0.213 - s * 0.787, 0.715 - c * 0.715 + s * 0.715,
+         0.072 + c * 0.928 + s * 0.072],
+    ])
+
+
+def compose(functions):
+    """
+    Fold CSS filter functions, applied left to right, into
+    the 12-tuple matrix taken by Image.convert('RGB', matrix).
+    """
+    matrix = [[1, 0, 0], [0, 1, 0], [0, 0, 1]]
+    offset = [0, 0, 0]
+    for rows, shift in functions:
+        matrix = [
+            [sum(rows[i][k] * matrix[k][j] for k in range(3)) for j in range(3)]
+            for i in range(3)
+        ]
+        offset = [
+            sum(rows[i][k] * offset[k] for k in range(3)) + shift[i]
+            for i in range(3)
+        ]
+    return tuple(
+        value for row, shift in zip(matrix, offset) for value in row + [shift * 255]
+    )
+
+
+# Blend modes on a backdrop channel a and overlay colour channel c,
+# see https://www.w3.org/TR/compositing-1/#blending
+
+def overlay(a, c):
+    return 2 * a * c if a <= 0.5 else 1 - 2 * (1 - a) * (1 - c)
+
+
+def color_dodge(a, c):
+    if a == 0:
+        return 0
+    return 1 if c >= 1 else min(1, a / (1 - c))
+
+
+def color_burn(a, c):
+    if a == 1:
+        return 1
+    return 0 if c <= 0 else 1 - min(1, (1 - a) / c)
+
+
+BLEND_MODES = {
+    'multiply': lambda a, c: a * c,
+    'screen': lambda a, c: a + c - a * c,
+    'overlay': overlay,
+    'darken': min,
+    'lighten': max,
+    'color-dodge': color_dodge,
+    'color-burn': color_burn,
+    'exclusion': lambda a, c: a + c - 2 * a * c,
+}
+
+
+def blend_table(blends):
+    """
+    Lookup table for Image.point() compositing each (mode, colour,
+    opacity) overlay onto the image in turn.
+    """
+    table = []
+    for channel in range(3):
+        for value in range(256):
+            a = value / 255
+            for mode, colour, opacity in blends:
+                c = colour[channel] / 255
+                a = (1 - opacity) * a + opacity * BLEND_MODES[mode](a, c)
+            table.append(round(255 * min(1, max(0, a))))
+    return table
+
+
+class ImageFilter:
+    def __init__(self, blends=(), functions=()):
+        self.table = blend_table(blends) if blends else None
+        self.matrix = compose(functions) if functions else None
+
+    def apply(self, image):
+        """
+        Filter an RGB image, returning a new one.
+        """
+        if self.table:
+            image = image.point(self.table)
+        if self.matrix:
+            image = image.convert('RGB', self.matrix)
+        return image
+
+
+# From CSSgram, which the frontend uses for image_filter
+FILTERS = {
+    '_1977': ImageFilter(
+        [('screen', (243, 106, 188), 0.3)],
+        [contrast(1.1), brightness(1.1), saturate(1.3)],
+    ),
+    'brannan': ImageFilter(
+        [('lighten', (161, 44, 199), 0.31)],
+        [sepia(0.5), contrast(1.4)],
+    ),
+    'earlybird': ImageFilter(
+        [('overlay', (208, 186, 142), 0.5)],
+        [contrast(0.9), sepia(0.2)],
+    ),
+    'hudson': ImageFilter(
+        [('multiply', (166, 177, 255), 0.5)],
+        [brightness(1.2), contrast(0.9), saturate(1.1)],
+    ),
+    'inkwell': ImageFilter(
+        [],
+        [sepia(0.3), contrast(1.1), brightness(1.1), grayscale(1)],
+    ),
+    'lofi': ImageFilter(
+        [('multiply', (34, 34, 34), 0.1)],
+        [saturate(1.1), contrast(1.5)],
+    ),
+    'kelvin': ImageFilter(
+        [('color-dodge', (56, 44, 52), 1), ('overlay', (183, 125, 33), 1)],
+    ),
+    'nashville': ImageFilter(
+        [('darken', (247, 176, 153), 0.56), ('lighten', (0, 70, 150), 0.4)],
+        [sepia(0.2), contrast(1.2), brightness(1.05), saturate(1.2)],
+    ),
+    'rise': ImageFilter(
+        [('multiply', (236, 205, 169), 0.15), ('overlay', (232, 197, 152), 0.48)],
+        [brightness(1.05), sepia(0.2), contrast(0.9), saturate(0.9)],
+    ),
+    'toaster': ImageFilter(
+        [('screen', (128, 78, 15), 0.5)],
+        [contrast(1.5), brightness(0.9)],
+    ),
+    'valencia': ImageFilter(
+        [('exclusion', (58, 3, 57), 0.5)],
+        [contrast(1.08), brightness(1.08), sepia(0.08)],
+    ),
+    'walden': ImageFilter(
+        [('screen', (0, 68, 204), 0.3)],
+        [brightness(1.1), hue_rotate(-10), sepia(0.3), saturate(1.6)],
+    ),
+    'xpro2': ImageFilter(
+        [('color-burn', (230, 231, 224), 0.6)],
+        [sepia(0.3)],
+    ),
+}
+
+
+def cached_filters(post):
+    """
+    {filter: {variant: storage name}} rendered from the post's current image.
+    """
+    if post.image_filtered.get('source') != post.image.name:
+        return {}
+    return post.image_filtered['filters']
+
+
+def needs_render(post):
+    return (
+        settings.RENDER_IMAGE_FILTERS
+        and post.image_filter in FILTERS
+        and post.image_status == READY
+        and not is_default_image(post.image)
+        and post.image_filter not in cached_filters(post)
+    )
+
+
+def render_filtered(pk):
+    """
+    Render each variant of a post's image through its current filter
+    and add them to image_filtered.
+    """
+    Post = apps.get_model('posts', 'Post')
+    post = Post.objects.filter(pk=pk).first()
+    if post is None or not needs_render(post):
+        return
+    name, image = post.image_filter, post.image
+    source = open_source(image)
+    digest = hashlib.md5(image.name.encode()).hexdigest()[:12]
+    rendered = {}
+    for variant, size in VARIANTS.items():
+        path = os.path.join(
+            'filtered', 'post', str(pk), f'{digest}-{name}-{variant}.jpg'
+        )
+        rendered[variant] = default_storage.save(
+            path, ContentFile(encode(FILTERS[name].apply(fit(source, size))))
+        )
+
+    # merge into the latest row, another filter may have been rendered
+    # meanwhile, and drop the result if the image has been replaced
+    post = Post.objects.filter(pk=pk, image=image.name).first()
+    if post is None:
+        return
+    post.image_filtered = {
+        'source': image.name,
+        'filters': {**cached_filters(post), name: rendered},
+    }
+    # updated_at moves too, so ETags change with the new URLs
+    post.save(update_fields=['image_filtered', 'updated_at'])
+
+
+def filtered_urls(post):
+    """
+    URLs of the variants rendered through the post's filter, or None if
+    they aren't available and clients have to apply it themselves.
+    """
+    return build_filtered_urls(
+        post.image.name, post.image_filter, post.image_filtered
+    )
+
+
+def build_filtered_urls(name, image_filter, image_filtered, storage_url=None):
+    """
+    filtered_urls() from the column values, for rows read with values().
+    """
+    storage_url = storage_url or default_storage.url
+    if image_filtered.get('source') != name:
+        return None
+    paths = image_filtered['filters'].get(image_filter)
+    if paths is None:
+        return None
+    return {variant: storage_url(path) for variant, path in paths.items()}
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+from posts.search import get_search_backend
+
+
+class Command(BaseCommand):
+    """
+    Reindex every post with the configured full-text search backend,
+    e.g. after enabling POST_SEARCH_BACKEND on existing data.
+    """
+    help = 'Rebuild the full-text search index for posts'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        if backend is None:
+            raise CommandError('POST_SEARCH_BACKEND is not set.')
+        backend.rebuild()
+        self.stdout.write(f'Rebuilt the index with {type(backend).__name__}')
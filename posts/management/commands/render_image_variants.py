@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from drf_api.images import render_missing_variants
+
+
+class Command(BaseCommand):
+    """
+    Render the thumbnail, feed and full variants of post and profile
+    images that don't have them yet, e.g. after deploying variants.
+    """
+    help = 'Render missing image variants'
+
+    def handle(self, *args, **options):
+        for label, rendered in render_missing_variants().items():
+            self.stdout.write(f'{label}: {rendered} image(s) rendered')
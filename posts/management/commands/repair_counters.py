@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from drf_api.counters import recount
+
+
+class Command(BaseCommand):
+    """
+    Recompute the stored likes, comments, posts and follower counts
+    and fix any rows that have drifted from the real values.
+    """
+    help = 'Recompute denormalized counters and repair drift'
+
+    def handle(self, *args, **options):
+        for label, drifted in recount().items():
+            self.stdout.write(f'{label}: {drifted} row(s) repaired')
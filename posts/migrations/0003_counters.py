@@ -0,0 +1,46 @@
+# Generated by Django 3.2.23 on 2026-10-18 03:32
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count(model, field, outer):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef(outer)}).order_by().values(
+            field
+        ).annotate(count=Count('pk')).values('count')
+    ), 0)
+
+
+def backfill_counts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Like = apps.get_model('likes', 'Like')
+    Comment = apps.get_model('comments', 'Comment')
+    Post.objects.update(
+        likes_count=count(Like, 'post', 'pk'),
+        comments_count=count(Comment, 'post', 'pk'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_post_image_filter'),
+        ('likes', '0001_initial'),
+        ('comments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
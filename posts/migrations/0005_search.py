@@ -0,0 +1,47 @@
+from django.db import migrations
+
+# The SQL is written out here rather than imported from posts/search.py,
+# so later changes to the backends don't change what this migration does
+CREATE_SQL = {
+    'postgresql': [
+        'ALTER TABLE posts_post ADD COLUMN IF NOT EXISTS search_vector tsvector',
+        'CREATE INDEX IF NOT EXISTS posts_post_search_idx '
+        'ON posts_post USING gin(search_vector)',
+    ],
+    'sqlite': [
+        'CREATE VIRTUAL TABLE IF NOT EXISTS posts_post_fts USING fts5('
+        "title, content, owner, tokenize='porter unicode61')",
+    ],
+}
+DROP_SQL = {
+    'postgresql': [
+        'DROP INDEX IF EXISTS posts_post_search_idx',
+        'ALTER TABLE posts_post DROP COLUMN IF EXISTS search_vector',
+    ],
+    'sqlite': ['DROP TABLE IF EXISTS posts_post_fts'],
+}
+
+
+def create_search_structures(apps, schema_editor):
+    for sql in CREATE_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def drop_search_structures(apps, schema_editor):
+    for sql in DROP_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    """
+    Create the full-text search column and GIN index on Postgres,
+    or the FTS5 table on SQLite, see posts/search.py.
+    """
+
+    dependencies = [
+        ('posts', '0004_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_structures, drop_search_structures),
+    ]
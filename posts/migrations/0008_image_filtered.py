@@ -0,0 +1,18 @@
+# Generated by Django 3.2.23 on 2026-10-18 03:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_image_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_filtered',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
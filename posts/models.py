@@ -1,12 +1,23 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
 from django.contrib.auth.models import User
+from drf_api.cache import cache_dependency
+from drf_api.counters import CounterMixin, track
+from drf_api.images import IMAGE_STATUS_CHOICES, READY, track_variants
+from drf_api.tasks import run_in_background
+from profiles.models import Profile
+from . import image_filters, search
 
 
-class Post(models.Model):
+class Post(CounterMixin, models.Model):
     """
     Post model, related to 'owner', i.e. a User instance.
     Default image set so that we can always reference image.url.
+    likes_count and comments_count are kept up to date by the Like
+    and Comment models, image_variants by drf_api/images.py
+    and image_filtered by posts/image_filters.py.
     """
+    counter_fields = ('likes_count', 'comments_count')
     image_filter_choices = [
         ('_1977', '1977'), ('brannan', 'Brannan'),
         ('earlybird', 'Earlybird'), ('hudson', 'Hudson'),
@@ -27,9 +38,74 @@ class Post(models.Model):
     image_filter = models.CharField(
         max_length=32, choices=image_filter_choices, default='normal'
     )
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    image_filtered = models.JSONField(default=dict, blank=True, editable=False)
+    # 'processing' while an upload is handled in the background
+    image_status = models.CharField(
+        max_length=16, choices=IMAGE_STATUS_CHOICES, default=READY,
+        editable=False,
+    )
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # the feed, and a profile's posts, newest first
+            models.Index(fields=['-created_at'], name='post_created_idx'),
+            models.Index(
+                fields=['owner', '-created_at'], name='post_owner_created_idx'
+            ),
+        ]
 
     def __str__(self):
-        return f'{self.id} {self.title}'
\ No newline at end of file
+        return f'{self.id} {self.title}'
+
+
+track(Post, 'owner', Profile, 'posts_count', target_field='owner')
+track_variants(Post)
+
+
+# Keep the full-text search index in sync, see posts/search.py.
+# The owner's username is indexed too, so renaming a user reindexes their posts
+def index_post(sender, instance, **kwargs):
+    search.update_index([instance.id])
+
+
+def unindex_post(sender, instance, **kwargs):
+    search.remove_from_index([instance.id])
+
+
+def index_owner_posts(sender, instance, created, update_fields, **kwargs):
+    if not created and update_fields != frozenset(['last_login']):
+        search.update_index(
+            list(Post.objects.filter(owner=instance).values_list('id', flat=True))
+        )
+
+
+# Render the filtered variants of new images and filters, see posts/image_filters.py
+def render_image_filter(sender, instance, **kwargs):
+    if image_filters.needs_render(instance):
+        run_in_background(image_filters.render_filtered, instance.pk)
+
+
+post_save.connect(render_image_filter, sender=Post)
+post_save.connect(index_post, sender=Post)
+post_delete.connect(unindex_post, sender=Post)
+post_save.connect(index_owner_posts, sender=User)
+
+
+def owner_post_ids(user_id):
+    return list(Post.objects.filter(owner_id=user_id).values_list('id', flat=True))
+
+
+# Drop cached post and profile responses embedding a changed row, see drf_api/cache.py
+cache_dependency(
+    Post,
+    post=lambda post: [post.id],
+    profile=lambda post: Profile.objects.filter(
+        owner_id=post.owner_id
+    ).values_list('id', flat=True),
+)
+cache_dependency(Profile, post=lambda profile: owner_post_ids(profile.owner_id))
+cache_dependency(User, post=lambda user: owner_post_ids(user.id))
@@ -0,0 +1,187 @@
+"""
+Full-text search backends for posts.
+
+settings.POST_SEARCH_BACKEND selects the backend: a dotted path to one
+of the classes below, 'auto' to pick one for the database in use, or
+None to disable full-text search. When it's disabled, ?search= falls
+back to DRF's SearchFilter, i.e. icontains on owner__username and title.
+
+Both backends keep their index in sync through the Post signals in
+posts/models.py, in the column or table posts/migrations/0005_search.py
+creates. After enabling a backend on existing data, run
+'manage.py rebuild_search_index' once.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework import filters
+
+TERM = re.compile(r'\w+')
+
+
+class BaseSearchBackend:
+    """
+    Each backend searches title, content and the owner's username,
+    matches every term as a prefix and ranks title and owner matches
+    above content matches.
+    """
+    # SQL selecting the ids of matching posts, and a post's relevance
+    # with higher being better, both taking the built query as parameter
+    match_sql = None
+    rank_sql = None
+
+    def index(self, post_ids):
+        raise NotImplementedError
+
+    def remove(self, post_ids):
+        raise NotImplementedError
+
+    def rebuild(self):
+        raise NotImplementedError
+
+    def build_query(self, terms):
+        raise NotImplementedError
+
+    def search(self, queryset, terms, order=True):
+        words = [word for term in terms for word in TERM.findall(term)]
+        if not words:
+            return queryset
+        query = self.build_query(words)
+        queryset = queryset.filter(id__in=RawSQL(self.match_sql, [query]))
+        if order:
+            queryset = queryset.annotate(
+                search_rank=RawSQL(self.rank_sql, [query])
+            ).order_by('-search_rank', '-created_at')
+        return queryset
+
+    def execute(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Keeps a weighted tsvector in posts_post.search_vector,
+    with a GIN index to match against.
+    """
+    match_sql = (
+        "SELECT id FROM posts_post "
+        "WHERE search_vector @@ to_tsquery('english', %s)"
+    )
+    rank_sql = "ts_rank(posts_post.search_vector, to_tsquery('english', %s))"
+    update_sql = """
+        UPDATE posts_post SET search_vector =
+            setweight(to_tsvector('english', posts_post.title), 'A') ||
+            setweight(to_tsvector('simple', auth_user.username), 'A') ||
+            setweight(to_tsvector('english', posts_post.content), 'B')
+        FROM auth_user WHERE auth_user.id = posts_post.owner_id
+    """
+
+    def index(self, post_ids):
+        self.execute(
+            self.update_sql + ' AND posts_post.id = ANY(%s)', [list(post_ids)]
+        )
+
+    def remove(self, post_ids):
+        # the vector is dropped along with the post row
+        pass
+
+    def rebuild(self):
+        self.execute(self.update_sql)
+
+    def build_query(self, words):
+        return ' & '.join(f'{word}:*' for word in words)
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """
+    Keeps an FTS5 table keyed on the post id, for development.
+    """
+    match_sql = 'SELECT rowid FROM posts_post_fts WHERE posts_post_fts MATCH %s'
+    # bm25() is lower for better matches, weighted title, content, owner
+    rank_sql = (
+        'SELECT -bm25(posts_post_fts, 10.0, 1.0, 10.0) FROM posts_post_fts '
+        'WHERE posts_post_fts MATCH %s AND rowid = posts_post.id'
+    )
+    insert_sql = """
+        INSERT INTO posts_post_fts (rowid, title, content, owner)
+        SELECT posts_post.id, posts_post.title, posts_post.content,
+            auth_user.username
+        FROM posts_post JOIN auth_user ON auth_user.id = posts_post.owner_id
+    """
+
+    def index(self, post_ids):
+        self.remove(post_ids)
+        placeholders = ', '.join(['%s'] * len(post_ids))
+        self.execute(
+            self.insert_sql + f' WHERE posts_post.id IN ({placeholders})',
+            list(post_ids)
+        )
+
+    def remove(self, post_ids):
+        placeholders = ', '.join(['%s'] * len(post_ids))
+        self.execute(
+            f'DELETE FROM posts_post_fts WHERE rowid IN ({placeholders})',
+            list(post_ids)
+        )
+
+    def rebuild(self):
+        self.execute('DELETE FROM posts_post_fts')
+        self.execute(self.insert_sql)
+
+    def build_query(self, words):
+        return ' '.join(f'"{word}"*' for word in words)
+
+
+BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+}
+
+
+def get_search_backend():
+    path = getattr(settings, 'POST_SEARCH_BACKEND', None)
+    if not path:
+        return None
+    if path == 'auto':
+        backend = BACKENDS.get(connection.vendor)
+        return backend() if backend else None
+    return import_string(path)()
+
+
+def update_index(post_ids):
+    backend = get_search_backend()
+    if backend and post_ids:
+        backend.index(post_ids)
+
+
+def remove_from_index(post_ids):
+    backend = get_search_backend()
+    if backend and post_ids:
+        backend.remove(post_ids)
+
+
+class PostSearchFilter(filters.SearchFilter):
+    """
+    Use the full-text search backend when one is enabled, ranking the
+    results unless the client asked for an explicit ordering, or for
+    keyset pages, which can't page by rank.
+    """
+    def should_rank(self, request, view):
+        if 'ordering' in request.query_params:
+            return False
+        paginator = getattr(view, 'paginator', None)
+        cursor = getattr(paginator, 'cursor_query_param', None)
+        return cursor not in request.query_params
+
+    def filter_queryset(self, request, queryset, view):
+        backend = get_search_backend()
+        terms = self.get_search_terms(request)
+        if backend is None or not terms:
+            return super().filter_queryset(request, queryset, view)
+        return backend.search(
+            queryset, terms, order=self.should_rank(request, view)
+        )
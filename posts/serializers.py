@@ -1,13 +1,26 @@
 from rest_framework import serializers
+from drf_api.sparse import SparseFieldsMixin
+from drf_api.images import (
+    ImageVariantsField, StagedImageMixin, build_variant_urls,
+)
+from drf_api.values import ValuesSerializer
+from posts.image_filters import build_filtered_urls, filtered_urls
 from posts.models import Post
+from profiles.models import Profile
 from likes.models import Like
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(SparseFieldsMixin, StagedImageMixin, serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.username')
     is_owner = serializers.SerializerMethodField()
     profile_id = serializers.ReadOnlyField(source='owner.profile.id')
     profile_image = serializers.ReadOnlyField(source='owner.profile.image.url')
+    # thumbnail, feed and full sized URLs of image and profile_image
+    image_variants = ImageVariantsField(source='*')
+    profile_image_variants = ImageVariantsField(source='owner.profile')
+    image_status = serializers.ReadOnlyField()
+    # image_variants rendered through image_filter, when RENDER_IMAGE_FILTERS is on
+    image_filtered = serializers.SerializerMethodField()
     like_id = serializers.SerializerMethodField()
     comments_count = serializers.ReadOnlyField()
     likes_count = serializers.ReadOnlyField()
@@ -22,6 +35,10 @@ class PostSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 'Image size larger than 2MB!'
             )
+        # With ASYNC_IMAGE_UPLOADS the upload hasn't been opened yet,
+        # its dimensions are checked in the background by process_upload
+        if not hasattr(value, 'image'):
+            return value
         if value.image.width > 4096:
             raise serializers.ValidationError(
                 'Image width larger than 4096px!'
@@ -33,13 +50,21 @@ class PostSerializer(serializers.ModelSerializer):
         # return original value passed into our validate_image function
         return value
 
+    def get_image_filtered(self, obj):
+        return filtered_urls(obj)
+
     def get_is_owner(self, obj):
+        # compare ids, so sparse querysets don't need to join the owner
         request = self.context['request']
-        return request.user == obj.owner
+        return request.user.pk == obj.owner_id
 
     def get_like_id(self, obj):
         user = self.context['request'].user
         if user.is_authenticated:
+            # The post views annotate like_id for the whole page, only
+            # instances loaded elsewhere (e.g. a freshly created post) need a query
+            if hasattr(obj, 'like_id'):
+                return obj.like_id
             like = Like.objects.filter(
                 owner=user, post=obj
             ).first()
@@ -53,4 +78,59 @@ class PostSerializer(serializers.ModelSerializer):
             'profile_image', 'created_at', 'updated_at',
             'title', 'content', 'image', 'image_filter', 'like_id',
             'comments_count', 'likes_count',
-        ]
\ No newline at end of file
+            'image_variants', 'profile_image_variants', 'image_status',
+            'image_filtered',
+        ]
+
+
+class PostValuesSerializer(ValuesSerializer):
+    """
+    PostSerializer's output for GET lists, from .values() rows.
+    """
+    columns = (
+        'id', 'owner_id', 'owner__username', 'owner__profile__id',
+        'owner__profile__image', 'owner__profile__image_variants',
+        'created_at', 'updated_at', 'title', 'content', 'image',
+        'image_filter', 'comments_count', 'likes_count', 'image_variants',
+        'image_status', 'image_filtered',
+    )
+    annotations = ('like_id',)
+    image_field = Post._meta.get_field('image')
+    profile_image_field = Profile._meta.get_field('image')
+
+    def to_representation(self, row):
+        image = row['image']
+        # FieldFile.url raises for cleared images, which render as null
+        image_url = self.file_url(self.image_field, image) if image else None
+        profile_image = row['owner__profile__image']
+        profile_image_url = self.file_url(
+            self.profile_image_field, profile_image
+        ) if profile_image else None
+        return {
+            'id': row['id'],
+            'owner': row['owner__username'],
+            'is_owner': self.is_owner(row['owner_id']),
+            'profile_id': row['owner__profile__id'],
+            'profile_image': profile_image_url,
+            'created_at': self.datetime(row['created_at']),
+            'updated_at': self.datetime(row['updated_at']),
+            'title': row['title'],
+            'content': row['content'],
+            'image': self.image_url(self.image_field, image),
+            'image_filter': row['image_filter'],
+            'like_id': row.get('like_id'),
+            'comments_count': row['comments_count'],
+            'likes_count': row['likes_count'],
+            'image_variants': build_variant_urls(
+                image, image_url, row['image_variants'], self.storage_url
+            ),
+            'profile_image_variants': build_variant_urls(
+                profile_image, profile_image_url,
+                row['owner__profile__image_variants'], self.storage_url,
+            ),
+            'image_status': row['image_status'],
+            'image_filtered': build_filtered_urls(
+                image, row['image_filter'], row['image_filtered'],
+                self.storage_url,
+            ),
+        }
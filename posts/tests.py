@@ -1,7 +1,22 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from PIL import Image
+from comments.models import Comment
+from likes.models import Like
 from .models import Post
+from .serializers import PostSerializer
+from .views import annotate_like_id
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
 
 # What happens for each test
 # At the very beginning, before any test is run, the test database is created
@@ -85,4 +100,475 @@ class PostDetailViewTests(APITestCase):
     def test_user_cant_update_another_users_post(self):
         self.client.login(username='adam', password='pass')
         response = self.client.put('/posts/2/', {'title': 'a new title'})
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+class PostListQueryCountTests(APITestCase):
+    def setUp(self):
+        adam = User.objects.create_user(username='adam', password='pass')
+        brian = User.objects.create_user(username='brian', password='pass')
+        for i in range(10):
+            post = Post.objects.create(owner=brian, title=f'post {i}')
+            if i % 2:
+                Like.objects.create(owner=adam, post=post)
+
+    def test_like_id_is_resolved_without_a_query_per_post(self):
+        self.client.login(username='adam', password='pass')
+        # session, user, the ETag's two aggregates,
+        # count and the posts themselves
+        with self.assertNumQueries(6):
+            response = self.client.get('/api/posts/')
+        results = response.data['results']
+        self.assertEqual(len(results), 10)
+        likes = {
+            like.post_id: like.id for like in Like.objects.all()
+        }
+        for post in results:
+            self.assertEqual(post['like_id'], likes.get(post['id']))
+
+
+class PostValuesSerializerTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        brian = User.objects.create_user(username='brian', password='pass')
+        # more than a page
+        for i in range(12):
+            post = Post.objects.create(
+                owner=brian if i % 2 else self.adam, title=f'post {i}',
+                content='some content', image_filter='kelvin',
+            )
+            if i % 2:
+                Like.objects.create(owner=self.adam, post=post)
+        # one post with rendered variants and filters
+        post = Post.objects.first()
+        Post.objects.filter(pk=post.pk).update(
+            image_variants={'source': post.image.name, 'feed': 'images/feed.jpg'},
+            image_filtered={
+                'source': post.image.name,
+                'filters': {'kelvin': {'feed': 'images/kelvin-feed.jpg'}},
+            },
+        )
+        # and one with its image cleared
+        Post.objects.filter(pk=Post.objects.all()[1].pk).update(image='')
+
+    def expected(self, user):
+        request = Request(APIRequestFactory().get('/api/posts/'))
+        request.user = user
+        posts = annotate_like_id(
+            Post.objects.select_related('owner__profile'), user
+        ).order_by('-created_at')
+        return PostSerializer(
+            posts, many=True, context={'request': request}
+        ).data
+
+    def assertMatchesSerializer(self, results, user):
+        expected = self.expected(user)[:len(results)]
+        self.assertEqual(results, expected)
+        # same keys in the same order
+        self.assertEqual(
+            [list(post) for post in results], [list(post) for post in expected]
+        )
+
+    def test_list_matches_post_serializer(self):
+        response = self.client.get('/api/posts/')
+        self.assertMatchesSerializer(
+            response.data['results'], response.wsgi_request.user
+        )
+        self.client.login(username='adam', password='pass')
+        response = self.client.get('/api/posts/')
+        self.assertMatchesSerializer(response.data['results'], self.adam)
+
+    def test_keyset_pages_use_the_rows(self):
+        self.client.login(username='adam', password='pass')
+        response = self.client.get('/api/posts/?cursor=')
+        results = response.data['results']
+        response = self.client.get(response.data['next'])
+        results += response.data['results']
+        self.assertEqual(len(results), 12)
+        self.assertIsNone(response.data['next'])
+        self.assertMatchesSerializer(results, self.adam)
+
+    def test_sparse_fields_use_the_serializer(self):
+        response = self.client.get('/api/posts/?fields=id,title')
+        self.assertEqual(list(response.data['results'][0]), ['id', 'title'])
+
+
+class PostCounterTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.brian = User.objects.create_user(username='brian', password='pass')
+        self.post = Post.objects.create(owner=self.adam, title='a title')
+
+    def test_counters_follow_likes_and_comments(self):
+        like = Like.objects.create(owner=self.brian, post=self.post)
+        Comment.objects.create(owner=self.brian, post=self.post, content='hi')
+        Comment.objects.create(owner=self.adam, post=self.post, content='yo')
+        response = self.client.get(f'/api/posts/{self.post.id}/')
+        self.assertEqual(response.data['likes_count'], 1)
+        self.assertEqual(response.data['comments_count'], 2)
+        like.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+        self.adam.profile.refresh_from_db()
+        self.assertEqual(self.adam.profile.posts_count, 1)
+
+    def test_updating_a_stale_post_keeps_counters(self):
+        stale = Post.objects.get(pk=self.post.pk)
+        Like.objects.create(owner=self.brian, post=self.post)
+        stale.title = 'a new title'
+        stale.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(self.post.title, 'a new title')
+
+    def test_deleting_with_a_drifted_counter_at_zero(self):
+        like = Like.objects.create(owner=self.brian, post=self.post)
+        Post.objects.filter(pk=self.post.pk).update(likes_count=0)
+        like.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+    def test_repair_counters_fixes_drift(self):
+        Like.objects.create(owner=self.brian, post=self.post)
+        Post.objects.filter(pk=self.post.pk).update(likes_count=7)
+        out = StringIO()
+        call_command('repair_counters', stdout=out)
+        self.assertIn('posts.Post.likes_count: 1 row(s) repaired', out.getvalue())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+
+
+@override_settings(POST_SEARCH_BACKEND='posts.search.SQLiteSearchBackend')
+class PostSearchTests(APITestCase):
+    def setUp(self):
+        adam = User.objects.create_user(username='adam', password='pass')
+        brian = User.objects.create_user(username='brian', password='pass')
+        Post.objects.create(owner=adam, title='sunset at the beach')
+        Post.objects.create(
+            owner=brian, title='holiday', content='another beach sunset'
+        )
+        Post.objects.create(owner=brian, title='mountains')
+
+    def search(self, query, extra=''):
+        response = self.client.get(f'/api/posts/?search={query}{extra}')
+        return [post['title'] for post in response.data['results']]
+
+    def test_search_matches_prefixes_and_content_ranked_by_relevance(self):
+        self.assertEqual(
+            self.search('suns bea'), ['sunset at the beach', 'holiday']
+        )
+
+    def test_search_matches_owner_username(self):
+        self.assertEqual(
+            sorted(self.search('bri', '&ordering=-likes_count')),
+            ['holiday', 'mountains']
+        )
+
+    def test_keyset_pages_keep_their_order(self):
+        response = self.client.get('/api/posts/?search=sunset&cursor=')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # newest first, not by rank
+        self.assertEqual(
+            [post['title'] for post in response.data['results']],
+            ['holiday', 'sunset at the beach'],
+        )
+
+    def test_index_follows_updates_and_deletes(self):
+        post = Post.objects.get(title='mountains')
+        post.title = 'mountain sunset'
+        post.save()
+        self.assertIn('mountain sunset', self.search('sunset'))
+        post.delete()
+        self.assertNotIn('mountain sunset', self.search('sunset'))
+
+    def test_logging_in_doesnt_reindex_the_users_posts(self):
+        with mock.patch('posts.search.update_index') as update_index:
+            self.client.login(username='brian', password='pass')
+        update_index.assert_not_called()
+        user = User.objects.get(username='brian')
+        user.username = 'brianna'
+        user.save()
+        self.assertEqual(sorted(self.search('brianna')), ['holiday', 'mountains'])
+
+    @override_settings(POST_SEARCH_BACKEND=None)
+    def test_search_falls_back_to_icontains_when_disabled(self):
+        self.assertEqual(self.search('sunset'), ['sunset at the beach'])
+
+    def test_rebuild_search_index(self):
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('SQLiteSearchBackend', out.getvalue())
+        self.assertEqual(len(self.search('beach')), 2)
+
+
+class PostDetailCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.brian = User.objects.create_user(username='brian', password='pass')
+        self.post = Post.objects.create(owner=self.adam, title='a title')
+        self.url = f'/api/posts/{self.post.id}/'
+
+    def test_anonymous_hits_dont_touch_the_database(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(first.data, second.data)
+
+    def test_viewer_fields_are_merged_per_request(self):
+        like = Like.objects.create(owner=self.brian, post=self.post)
+        self.client.get(self.url)
+        self.client.login(username='brian', password='pass')
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['like_id'], like.id)
+        self.assertFalse(response.data['is_owner'])
+        self.client.login(username='adam', password='pass')
+        response = self.client.get(self.url)
+        self.assertIsNone(response.data['like_id'])
+        self.assertTrue(response.data['is_owner'])
+
+    def test_changes_invalidate_the_cached_post(self):
+        self.client.get(self.url)
+        Like.objects.create(owner=self.brian, post=self.post)
+        Comment.objects.create(owner=self.brian, post=self.post, content='hi')
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['likes_count'], 1)
+        self.assertEqual(response.data['comments_count'], 1)
+        self.adam.username = 'adam2'
+        self.adam.save()
+        self.assertEqual(self.client.get(self.url).data['owner'], 'adam2')
+        self.post.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class PostIncludeCommentsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.post = Post.objects.create(owner=self.adam, title='a title')
+        for i in range(12):
+            Comment.objects.create(
+                owner=self.adam, post=self.post, content=f'comment {i}'
+            )
+        other = Post.objects.create(owner=self.adam, title='other')
+        Comment.objects.create(owner=self.adam, post=other, content='other')
+        self.url = f'/api/posts/{self.post.id}/?include=comments'
+        self.client.login(username='adam', password='pass')
+
+    def test_post_includes_its_first_comment_page(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['title'], 'a title')
+        comments = response.data['comments']
+        listed = self.client.get(f'/api/comments/?post={self.post.id}').data
+        self.assertEqual(comments['count'], 12)
+        self.assertEqual(comments['results'], listed['results'])
+        self.assertEqual(comments['next'], listed['next'])
+        self.assertIn('/api/comments/?', comments['next'])
+        self.assertNotIn('comments', self.client.get(
+            f'/api/posts/{self.post.id}/'
+        ).data)
+
+    def test_keyset_comment_pages(self):
+        comments = self.client.get(self.url + '&cursor=').data['comments']
+        self.assertNotIn('count', comments)
+        response = self.client.get(comments['next'])
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_fixed_number_of_queries(self):
+        self.client.get(self.url)
+        # session, user, like_id, the comments' ETag aggregate,
+        # their count and page
+        with self.assertNumQueries(6):
+            self.client.get(self.url)
+
+    def test_new_comments_change_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=etag
+        ).status_code, 304)
+        comment = Comment.objects.filter(post=self.post).first()
+        comment.content = 'edited'
+        comment.save()
+        self.assertEqual(self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=etag
+        ).status_code, 200)
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_upload(width, height, format='PNG', **options):
+    output = BytesIO()
+    Image.new('RGB', (width, height), 'red').save(output, format, **options)
+    return SimpleUploadedFile(
+        f'photo.{format.lower()}', output.getvalue(),
+        content_type=f'image/{format.lower()}',
+    )
+
+
+@override_settings(
+    DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+    MEDIA_ROOT=MEDIA_ROOT,
+    BACKGROUND_TASKS_EAGER=True,
+)
+class ImageVariantTests(APITestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.client.login(username='adam', password='pass')
+
+    def upload(self, width=2000, height=1000):
+        return make_upload(width, height)
+
+    def test_variants_are_rendered_after_upload(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/posts/', {'title': 'a title', 'image': self.upload()}
+            )
+        post = Post.objects.get(pk=response.data['id'])
+        # until the task has run clients get the original everywhere
+        self.assertEqual(
+            set(response.data['image_variants'].values()), {post.image.url}
+        )
+        variants = self.client.get(f'/api/posts/{post.id}/').data['image_variants']
+        for name, width in [('thumbnail', 96), ('feed', 640), ('full', 1600)]:
+            path = post.image_variants[name]
+            self.assertTrue(variants[name].endswith(path))
+            with Image.open(f'{MEDIA_ROOT}/{path}') as image:
+                self.assertEqual(image.size, (width, width // 2))
+
+    def test_profile_image_variants_follow_the_profile(self):
+        profile = self.adam.profile
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.image = self.upload(200, 200)
+            profile.save()
+        post = Post.objects.create(owner=self.adam, title='a title')
+        response = self.client.get(f'/api/posts/{post.id}/')
+        profile.refresh_from_db()
+        self.assertTrue(response.data['profile_image_variants'][
+            'thumbnail'
+        ].endswith(profile.image_variants['thumbnail']))
+
+    def test_default_images_have_no_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(owner=self.adam, title='a title')
+        post.refresh_from_db()
+        self.assertEqual(post.image_variants, {})
+
+    def test_cleared_images_have_no_variants(self):
+        # e.g. through the admin's "Clear" checkbox
+        post = Post.objects.create(owner=self.adam, title='a title', image='')
+        response = self.client.get(f'/api/posts/{post.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['image'])
+        self.assertIsNone(response.data['image_variants'])
+        response = self.client.put(
+            f'/api/posts/{post.id}/', {'title': 'a new title'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(
+    DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+    MEDIA_ROOT=MEDIA_ROOT,
+    IMAGE_STAGING_ROOT=f'{MEDIA_ROOT}/staging',
+    BACKGROUND_TASKS_EAGER=True,
+    ASYNC_IMAGE_UPLOADS=True,
+)
+class AsyncImageUploadTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username='adam', password='pass')
+        self.client.login(username='adam', password='pass')
+
+    def create(self, upload):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/posts/', {'title': 'a title', 'image': upload}
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['image_status'], 'processing')
+        return self.client.get(f"/api/posts/{response.data['id']}/").data
+
+    def test_upload_is_processed_in_the_background(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # orientation: rotated 90 degrees
+        exif[0x010F] = 'Camera'
+        post = self.create(make_upload(300, 200, 'JPEG', exif=exif))
+        self.assertEqual(post['image_status'], 'ready')
+        image = Post.objects.get(pk=post['id']).image
+        self.assertTrue(image.name.startswith('images/photo'))
+        with Image.open(image.path) as stored:
+            self.assertEqual(stored.size, (200, 300))
+            self.assertFalse(stored.getexif())
+        self.assertFalse(os.listdir(f'{MEDIA_ROOT}/staging'))
+
+    def test_oversized_upload_fails(self):
+        post = self.create(make_upload(4097, 10))
+        self.assertEqual(post['image_status'], 'failed')
+        self.assertEqual(
+            Post.objects.get(pk=post['id']).image.name, '../default_post_vbbiop'
+        )
+
+    def test_undecodable_upload_fails(self):
+        upload = SimpleUploadedFile(
+            'photo.png', b'not an image', content_type='image/png'
+        )
+        self.assertEqual(self.create(upload)['image_status'], 'failed')
+
+    def test_storage_errors_fail_the_upload(self):
+        with mock.patch(
+            'django.db.models.fields.files.FieldFile.save',
+            side_effect=RuntimeError('storage is down'),
+        ), self.assertLogs('drf_api.images', 'ERROR'):
+            post = self.create(make_upload(300, 200))
+        self.assertEqual(post['image_status'], 'failed')
+        self.assertFalse(os.listdir(f'{MEDIA_ROOT}/staging'))
+
+
+@override_settings(
+    DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+    MEDIA_ROOT=MEDIA_ROOT,
+    BACKGROUND_TASKS_EAGER=True,
+    RENDER_IMAGE_FILTERS=True,
+)
+class ImageFilterRenderTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username='adam', password='pass')
+        self.client.login(username='adam', password='pass')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/posts/', {
+                'title': 'a title', 'image': make_upload(800, 400),
+                'image_filter': 'kelvin',
+            })
+        self.url = f"/api/posts/{response.data['id']}/"
+
+    def set_filter(self, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(self.url, {'title': 'a title', 'image_filter': name})
+        return self.client.get(self.url).data
+
+    def test_filter_is_rendered_for_each_variant(self):
+        filtered = self.client.get(self.url).data['image_filtered']
+        self.assertEqual(set(filtered), {'thumbnail', 'feed', 'full'})
+        self.assertIn('-kelvin-feed', filtered['feed'])
+
+    def test_changing_the_filter_only_renders_that_filter(self):
+        kelvin = self.client.get(self.url).data['image_filtered']
+        inkwell = self.set_filter('inkwell')['image_filtered']
+        path = inkwell['feed'].split('/media/')[-1]
+        with Image.open(f'{MEDIA_ROOT}/{path}') as image:
+            red, green, blue = image.getpixel((0, 0))
+            self.assertEqual(red, green)
+        # switching back reuses the earlier render
+        self.assertEqual(self.set_filter('kelvin')['image_filtered'], kelvin)
+
+    def test_normal_isnt_rendered(self):
+        self.assertIsNone(self.set_filter('normal')['image_filtered'])
@@ -1,9 +1,10 @@
 from django.urls import path
+from drf_api.async_views import read_view
 from posts import views
 
 
-# PostList is a class view so remember to call as_view on it
+# PostList is a class view, read_view calls as_view on it
 urlpatterns = [
-    path('posts/', views.PostList.as_view()),
-    path('posts/<int:pk>/', views.PostDetail.as_view()),
+    path('posts/', read_view(views.PostList)),
+    path('posts/<int:pk>/', read_view(views.PostDetail)),
 ]
\ No newline at end of file
@@ -89,28 +89,65 @@
 
 
 # Refactured code to use generic views
-from django.db.models import Count
+import copy
+
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+from django.http import QueryDict
+from django.urls import reverse
 from rest_framework import generics, permissions, filters
+from rest_framework.request import Request
 from django_filters.rest_framework import DjangoFilterBackend
+from comments.models import Comment
+from comments.views import CommentList
+from drf_api.cache import ObjectCacheMixin
+from drf_api.conditional import ConditionalGetMixin, checksum, latest_pk
 from drf_api.permissions import IsOwnerOrReadOnly
+from drf_api.sparse import SparseFieldsViewMixin
+from drf_api.values import ValuesListMixin
+from likes.models import Like
 from .models import Post
-from .serializers import PostSerializer
+from .search import PostSearchFilter
+from .serializers import PostSerializer, PostValuesSerializer
+
+
+def annotate_like_id(queryset, user):
+    """
+    Annotate each post with the id of the user's like, if any.
+    This resolves like_id for a whole page in the posts query itself
+    instead of PostSerializer running one query per post.
+    """
+    if not user.is_authenticated:
+        return queryset
+    return queryset.annotate(
+        like_id=Subquery(
+            Like.objects.filter(
+                owner=user, post=OuterRef('pk')
+            ).values('id')[:1]
+        )
+    )
 
 
-class PostList(generics.ListCreateAPIView):
+class PostList(
+    ConditionalGetMixin, SparseFieldsViewMixin, ValuesListMixin,
+    generics.ListCreateAPIView,
+):
     """
     List posts or create a post if logged in
     The perform_create method associates the post with the logged in user.
+    GET responses carry an ETag, see version_aggregates.
+    Pages are rendered from .values() rows, see drf_api/values.py.
     """
     serializer_class = PostSerializer
+    values_serializer_class = PostValuesSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    queryset = Post.objects.annotate(
-        likes_count=Count('likes', distinct=True),
-        comments_count=Count('comment', distinct=True)
+    queryset = Post.objects.select_related(
+        'owner__profile'
     ).order_by('-created_at')
     filter_backends = [
         filters.OrderingFilter,
-        filters.SearchFilter,
+        # full-text search when settings.POST_SEARCH_BACKEND is set,
+        # DRF's SearchFilter otherwise
+        PostSearchFilter,
         DjangoFilterBackend,
     ]
     # For djangofilterbackend
@@ -129,17 +166,121 @@ class PostList(generics.ListCreateAPIView):
         'likes__created_at',
     ]
 
+    # Likes and comments don't touch updated_at, so the counters are
+    # versioned by their totals and the newest like and comment.
+    # Renaming a user touches their profile's updated_at
+    version_aggregates = {
+        'count': Count('pk'),
+        'updated_at': Max('updated_at'),
+        'profile_updated_at': Max('owner__profile__updated_at'),
+        'owners': checksum('owner__username'),
+        'likes': Sum('likes_count'),
+        'latest_like': latest_pk(Like.objects.filter(post=OuterRef('pk'))),
+        'comments': Sum('comments_count'),
+        'latest_comment': latest_pk(
+            Comment.objects.filter(post=OuterRef('pk'))
+        ),
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.wants('like_id'):
+            return queryset
+        return annotate_like_id(queryset, self.request.user)
+
+    def get_viewer_version(self):
+        # like_id changes with the viewer's own likes
+        user = self.request.user
+        if not user.is_authenticated:
+            return None
+        return [user.pk, Like.objects.filter(owner=user).aggregate(
+            count=Count('pk'), latest=Max('pk')
+        )]
+
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
 
-class PostDetail(generics.RetrieveUpdateDestroyAPIView):
+class PostDetail(ObjectCacheMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve a post and edit or delete it if you own it.
+    GET responses are cached per post, with is_owner and like_id
+    filled in for each request.
+    ?include=comments adds the first page of the post's comments, as
+    /api/comments/?post=<id> would list them, so the post page needs one
+    request. Its next link points there for the later pages, and with
+    ?cursor= the page is a keyset one.
     """
+    cache_prefix = 'post'
+    viewer_fields = ('is_owner', 'like_id')
     serializer_class = PostSerializer
     permission_classes = [IsOwnerOrReadOnly]
-    queryset = Post.objects.annotate(
-        likes_count=Count('likes', distinct=True),
-        comments_count=Count('comment', distinct=True)
-    ).order_by('-created_at')
\ No newline at end of file
+    queryset = Post.objects.select_related(
+        'owner__profile'
+    ).order_by('-created_at')
+
+    def get_queryset(self):
+        return annotate_like_id(super().get_queryset(), self.request.user)
+
+    def get_viewer_fields(self, owner_id):
+        fields = super().get_viewer_fields(owner_id)
+        user = self.request.user
+        fields['like_id'] = None
+        if user.is_authenticated and self.wants('like_id'):
+            fields['like_id'] = Like.objects.filter(
+                owner=user, post=self.kwargs['pk']
+            ).values_list('id', flat=True).first()
+        return fields
+
+    def get_includes(self):
+        return set(self.request.query_params.get('include', '').split(','))
+
+    def get_comments_view(self):
+        """
+        A CommentList for this post's comments, sharing the request's user.
+        """
+        query = QueryDict(mutable=True)
+        query['post'] = self.kwargs['pk']
+        if 'cursor' in self.request.query_params:
+            query['cursor'] = ''
+        if 'timestamps' in self.request.query_params:
+            query['timestamps'] = self.request.query_params['timestamps']
+        http_request = copy.copy(self.request._request)
+        http_request.path = http_request.path_info = reverse('comment-list')
+        http_request.GET = query
+        http_request.META = {
+            **http_request.META, 'QUERY_STRING': query.urlencode()
+        }
+        request = Request(http_request, authenticators=())
+        request.user = self.request.user
+        request.auth = self.request.auth
+        # filtered here, as the filter backend would load the post again
+        # to validate ?post= for both the ETag and the page
+        return CommentList(
+            request=request, args=(), kwargs={}, format_kwarg=None,
+            queryset=CommentList.queryset.filter(post=self.kwargs['pk']),
+            filter_backends=[],
+        )
+
+    def get_extra_version(self):
+        if self.comments_view is None:
+            return None
+        return [
+            self.comments_view.get_viewer_version(),
+            self.comments_view.get_list_version(),
+        ]
+
+    def retrieve(self, request, *args, **kwargs):
+        self.comments_view = None
+        if 'comments' in self.get_includes():
+            self.comments_view = self.get_comments_view()
+        response = super().retrieve(request, *args, **kwargs)
+        if self.comments_view is not None and response.status_code == 200:
+            view = self.comments_view
+            page = view.paginate_queryset(
+                view.filter_queryset(view.get_queryset())
+            )
+            response.data['comments'] = view.get_paginated_response(
+                view.get_serializer(page, many=True).data
+            ).data
+        return response
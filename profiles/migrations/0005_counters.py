@@ -0,0 +1,52 @@
+# Generated by Django 3.2.23 on 2026-10-18 03:32
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count(model, field, outer):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef(outer)}).order_by().values(
+            field
+        ).annotate(count=Count('pk')).values('count')
+    ), 0)
+
+
+def backfill_counts(apps, schema_editor):
+    Profile = apps.get_model('profiles', 'Profile')
+    Post = apps.get_model('posts', 'Post')
+    Follower = apps.get_model('followers', 'Follower')
+    Profile.objects.update(
+        posts_count=count(Post, 'owner', 'owner'),
+        followers_count=count(Follower, 'followed', 'owner'),
+        following_count=count(Follower, 'owner', 'owner'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0004_alter_profile_image'),
+        ('posts', '0001_initial'),
+        ('followers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
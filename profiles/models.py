@@ -1,8 +1,14 @@
 from django.db import models
 from django.db.models.signals import post_save
 from django.contrib.auth.models import User
+from drf_api.cache import cache_dependency
+from drf_api.counters import CounterMixin
+from drf_api.images import track_variants
 
-class Profile(models.Model):
+class Profile(CounterMixin, models.Model):
+    # posts_count, followers_count and following_count are kept up to date
+    # by the Post and Follower models
+    counter_fields = ('posts_count', 'followers_count', 'following_count')
     owner = models.OneToOneField(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -11,6 +17,11 @@ class Profile(models.Model):
     image = models.ImageField(
         upload_to='images/', default='../default_profile_ljw2on'
     )
+    # resized copies of image, see drf_api/images.py
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    posts_count = models.PositiveIntegerField(default=0, editable=False)
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    following_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ['-created_at']
@@ -31,3 +42,15 @@ def create_profile(sender, instance, created, **kwargs):
 # create_profile is the function which should run eery time and User as the model we're expecting the signal from
 post_save.connect(create_profile, sender=User)
 
+
+track_variants(Profile)
+
+
+# Drop cached profile responses when the profile or its user changes, see drf_api/cache.py
+cache_dependency(Profile, profile=lambda profile: [profile.id])
+cache_dependency(
+    User,
+    profile=lambda user: Profile.objects.filter(
+        owner=user
+    ).values_list('id', flat=True),
+)
@@ -1,4 +1,7 @@
 from rest_framework import serializers
+from drf_api.sparse import SparseFieldsMixin
+from drf_api.images import ImageVariantsField, build_variant_urls
+from drf_api.values import ValuesSerializer
 from .models import Profile
 from followers.models import Follower
 
@@ -10,7 +13,7 @@ from followers.models import Follower
 
 
 # Create a ProfileSerializer class and inherit from ModelSerializer and specify owner as a readonly field so it can't be edited
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.username')
 
     # Now that we know whether or not a user making the request owns hte profile, we can also add this information as a field for our convenience
@@ -21,13 +24,16 @@ class ProfileSerializer(serializers.ModelSerializer):
     posts_count = serializers.ReadOnlyField()
     followers_count = serializers.ReadOnlyField()
     following_count = serializers.ReadOnlyField()
-    
+    # thumbnail, feed and full sized URLs of image
+    image_variants = ImageVariantsField(source='*')
+
 
     def get_is_owner(self, obj):
         # We can access the context object that was passed into the serializer in the views file and save the request into a variable
         # We'll return true if the user is also the object's owner, which in our case would be the profile
+        # compare ids, so sparse querysets don't need to join the owner
         request = self.context['request']
-        return request.user == obj.owner
+        return request.user.pk == obj.owner_id
     
     def get_following_id(self, obj):
         # Get the current user from the context object and check if the user is authenticated
@@ -36,6 +42,10 @@ class ProfileSerializer(serializers.ModelSerializer):
         # If the logged in user is not following this profile none will be returned
         user = self.context['request'].user
         if user.is_authenticated:
+            # ProfileList and ProfileDetail annotate following_id up front,
+            # so we only query here for profiles loaded some other way
+            if hasattr(obj, 'following_id'):
+                return obj.following_id
             following = Follower.objects.filter(
                 owner=user, followed=obj.owner
             ).first()
@@ -56,4 +66,40 @@ class ProfileSerializer(serializers.ModelSerializer):
             'id', 'owner', 'created_at', 'updated_at', 'name',
             'content', 'image', 'is_owner', 'following_id',
             'posts_count', 'followers_count', 'following_count',
+            'image_variants',
         ]
+
+
+class ProfileValuesSerializer(ValuesSerializer):
+    """
+    ProfileSerializer's output for GET lists, from .values() rows.
+    """
+    columns = (
+        'id', 'owner_id', 'owner__username', 'created_at', 'updated_at',
+        'name', 'content', 'image', 'posts_count', 'followers_count',
+        'following_count', 'image_variants',
+    )
+    annotations = ('following_id',)
+    image_field = Profile._meta.get_field('image')
+
+    def to_representation(self, row):
+        image = row['image']
+        return {
+            'id': row['id'],
+            'owner': row['owner__username'],
+            'created_at': self.datetime(row['created_at']),
+            'updated_at': self.datetime(row['updated_at']),
+            'name': row['name'],
+            'content': row['content'],
+            'image': self.image_url(self.image_field, image),
+            'is_owner': self.is_owner(row['owner_id']),
+            'following_id': row.get('following_id'),
+            'posts_count': row['posts_count'],
+            'followers_count': row['followers_count'],
+            'following_count': row['following_count'],
+            'image_variants': build_variant_urls(
+                image,
+                self.file_url(self.image_field, image) if image else None,
+                row['image_variants'], self.storage_url,
+            ),
+        }
@@ -1,3 +1,124 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+from followers.models import Follower
+from posts.models import Post
+from .models import Profile
+from .serializers import ProfileSerializer
+from .views import annotate_following_id
 
-# Create your tests here.
+
+class ProfileListViewTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        adam = User.objects.create_user(username='adam', password='pass')
+        for i in range(9):
+            user = User.objects.create_user(username=f'user{i}', password='pass')
+            if i % 2:
+                Follower.objects.create(owner=adam, followed=user)
+
+    def test_following_id_is_resolved_without_a_query_per_profile(self):
+        self.client.login(username='adam', password='pass')
+        # session, user, the ETag's two aggregates,
+        # count and the profiles themselves
+        with self.assertNumQueries(6):
+            response = self.client.get('/api/profiles/')
+        results = response.data['results']
+        self.assertEqual(len(results), 10)
+        following = {
+            follower.followed.profile.id: follower.id
+            for follower in Follower.objects.all()
+        }
+        for profile in results:
+            self.assertEqual(
+                profile['following_id'], following.get(profile['id'])
+            )
+
+    def test_profile_detail_includes_following_id(self):
+        self.client.login(username='adam', password='pass')
+        follower = Follower.objects.first()
+        profile = Profile.objects.get(owner=follower.followed)
+        response = self.client.get(f'/api/profiles/{profile.id}/')
+        self.assertEqual(response.data['following_id'], follower.id)
+
+
+class ProfileValuesSerializerTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        for i in range(4):
+            user = User.objects.create_user(username=f'user{i}', password='pass')
+            if i % 2:
+                Follower.objects.create(owner=self.adam, followed=user)
+        profile = self.adam.profile
+        Profile.objects.filter(pk=profile.pk).update(
+            name='Adam', image_variants={
+                'source': profile.image.name, 'thumbnail': 'images/thumb.jpg'
+            },
+        )
+        Profile.objects.filter(owner__username='user0').update(image='')
+
+    def test_list_matches_profile_serializer(self):
+        for user in [None, self.adam]:
+            if user:
+                self.client.login(username='adam', password='pass')
+            response = self.client.get('/api/profiles/')
+            request = Request(APIRequestFactory().get('/api/profiles/'))
+            request.user = response.wsgi_request.user
+            expected = ProfileSerializer(
+                annotate_following_id(
+                    Profile.objects.select_related('owner'), request.user
+                ).order_by('-created_at'),
+                many=True, context={'request': request},
+            ).data
+            results = response.data['results']
+            self.assertEqual(results, expected)
+            self.assertEqual(
+                [list(profile) for profile in results],
+                [list(profile) for profile in expected],
+            )
+
+
+class ProfileCounterTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_counters_follow_posts_and_followers(self):
+        adam = User.objects.create_user(username='adam', password='pass')
+        brian = User.objects.create_user(username='brian', password='pass')
+        Post.objects.create(owner=adam, title='a title')
+        follower = Follower.objects.create(owner=brian, followed=adam)
+        response = self.client.get(f'/api/profiles/{adam.profile.id}/')
+        self.assertEqual(response.data['posts_count'], 1)
+        self.assertEqual(response.data['followers_count'], 1)
+        self.assertEqual(response.data['following_count'], 0)
+        follower.delete()
+        brian.profile.refresh_from_db()
+        self.assertEqual(brian.profile.following_count, 0)
+
+
+class ProfileDetailCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.brian = User.objects.create_user(username='brian', password='pass')
+        self.url = f'/api/profiles/{self.adam.profile.id}/'
+
+    def test_follow_invalidates_and_following_id_is_per_viewer(self):
+        self.client.get(self.url)
+        follower = Follower.objects.create(owner=self.brian, followed=self.adam)
+        self.client.login(username='brian', password='pass')
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['followers_count'], 1)
+        self.assertEqual(response.data['following_id'], follower.id)
+        self.client.logout()
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertIsNone(response.data['following_id'])
+
+    def test_profile_update_invalidates(self):
+        self.client.get(self.url)
+        self.client.login(username='adam', password='pass')
+        self.client.put(self.url, {'name': 'Adam'})
+        self.assertEqual(self.client.get(self.url).data['name'], 'Adam')
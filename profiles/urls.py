@@ -1,9 +1,10 @@
 from django.urls import path
+from drf_api.async_views import read_view
 from profiles import views
 
 
-# ProfileList is a class view so remember to call as_view on it
+# ProfileList is a class view, read_view calls as_view on it
 urlpatterns = [
-    path('profiles/', views.ProfileList.as_view()),
-    path('profiles/<int:pk>/', views.ProfileDetail.as_view()),
+    path('profiles/', read_view(views.ProfileList)),
+    path('profiles/<int:pk>/', read_view(views.ProfileDetail)),
 ]
\ No newline at end of file
@@ -74,38 +74,57 @@
 
 
 # Refactured code to use generic views
-from django.db.models import Count
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
 from rest_framework import generics, filters
 from django_filters.rest_framework import DjangoFilterBackend
+from drf_api.cache import ObjectCacheMixin
+from drf_api.conditional import ConditionalGetMixin, checksum, latest_pk
 from drf_api.permissions import IsOwnerOrReadOnly
+from drf_api.sparse import SparseFieldsViewMixin
+from drf_api.values import ValuesListMixin
+from followers.models import Follower
+from posts.models import Post
 from .models import Profile
-from .serializers import ProfileSerializer
+from .serializers import ProfileSerializer, ProfileValuesSerializer
 
 
-class ProfileList(generics.ListAPIView):
+def annotate_following_id(queryset, user):
+    """
+    Annotate each profile with the id of the user's follow, if any.
+    This resolves following_id for every profile on the page in one query
+    instead of ProfileSerializer running one query per profile.
+    """
+    if not user.is_authenticated:
+        return queryset
+    return queryset.annotate(
+        following_id=Subquery(
+            Follower.objects.filter(
+                owner=user, followed=OuterRef('owner')
+            ).values('id')[:1]
+        )
+    )
+
+
+class ProfileList(
+    ConditionalGetMixin, SparseFieldsViewMixin, ValuesListMixin,
+    generics.ListAPIView,
+):
     """
     List all profiles.
     No create view as profile creation is handled by django signals.
+    GET responses carry an ETag, see version_aggregates.
+    Pages are rendered from .values() rows, see drf_api/values.py.
     """
     # queryset = Profile.objects.all()
 
-    # The annotate function allows us to define extra fields to be added to the queryset. In this case
-    # we will add fields to work out how many posts and followers a user have and how many others they're following
-    # Define field called posts_count, for how many posts a user has, and then we'll use the Count class we imported
-    # earlier because we want to count how many posts there are. There is no direct relationship between profile and post so we need
-    # to go through the user model to get there, so inside the Count class we will need to perform a lookup that spans the profile, user and post
-    # models, so we can get to the POst model with the instances we want to count. Similar to when we used dot notation, the first part of our lookup
-    # string is the owner field on the profile model, which is a OneToOne field referencing user. From there we can reach the Post model, so we have to 
-    # add double underscore post to show the relationship between Profile, User and Post. As we'll be defining more than one field inside the annotate function, 
-    # we also need to pass distinct=True here to only count the unique posts, without this there would be duplicates.
-    queryset = Profile.objects.annotate(
-        posts_count=Count('owner__post', distinct=True),
-        followers_count=Count('owner__followed', distinct=True),
-        following_count=Count('owner__following', distinct=True)
-    ).order_by('-created_at')
+    # posts_count, followers_count and following_count are stored on the profile and kept
+    # up to date as posts and followers are created and deleted, so we don't need to annotate them
+    # with Count over joins to the post and follower tables.
+    queryset = Profile.objects.select_related('owner').order_by('-created_at')
     serializer_class = ProfileSerializer
+    values_serializer_class = ProfileValuesSerializer
 
-    # To create a filter and made the fields sortable, set the filter_backends attribute to OrderingFilter and set the ordering_fields to the fields we just annotated
+    # To create a filter and made the fields sortable, set the filter_backends attribute to OrderingFilter and set the ordering_fields to the count fields
     filter_backends = [
         filters.OrderingFilter,
         DjangoFilterBackend,
@@ -122,16 +141,65 @@ class ProfileList(generics.ListAPIView):
         'owner__followed__created_at',
     ]
 
-
-class ProfileDetail(generics.RetrieveUpdateAPIView):
+    # Posts and follows don't touch updated_at, so the counters are
+    # versioned by their totals and the newest post and follow.
+    # Renaming a user touches their profile's updated_at
+    version_aggregates = {
+        'count': Count('pk'),
+        'updated_at': Max('updated_at'),
+        'owners': checksum('owner__username'),
+        'posts': Sum('posts_count'),
+        'latest_post': latest_pk(Post.objects.filter(owner=OuterRef('owner'))),
+        'followers': Sum('followers_count'),
+        'latest_follower': latest_pk(
+            Follower.objects.filter(followed=OuterRef('owner'))
+        ),
+        'following': Sum('following_count'),
+        'latest_following': latest_pk(
+            Follower.objects.filter(owner=OuterRef('owner'))
+        ),
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.wants('following_id'):
+            return queryset
+        return annotate_following_id(queryset, self.request.user)
+
+    def get_viewer_version(self):
+        # following_id changes with the viewer's own follows
+        user = self.request.user
+        if not user.is_authenticated:
+            return None
+        return [user.pk, Follower.objects.filter(owner=user).aggregate(
+            count=Count('pk'), latest=Max('pk')
+        )]
+
+
+class ProfileDetail(ObjectCacheMixin, generics.RetrieveUpdateAPIView):
     """
     Retrieve or update a profile if you're the owner.
+    GET responses are cached per profile, with is_owner and following_id
+    filled in for each request.
     """
+    cache_prefix = 'profile'
+    viewer_fields = ('is_owner', 'following_id')
     permission_classes = [IsOwnerOrReadOnly]
     # queryset = Profile.objects.all()
-    queryset = Profile.objects.annotate(
-        posts_count=Count('owner__post', distinct=True),
-        followers_count=Count('owner__followed', distinct=True),
-        following_count=Count('owner__following', distinct=True)
-    ).order_by('-created_at')
+    queryset = Profile.objects.select_related('owner').order_by('-created_at')
     serializer_class = ProfileSerializer
+
+    def get_queryset(self):
+        return annotate_following_id(
+            super().get_queryset(), self.request.user
+        )
+
+    def get_viewer_fields(self, owner_id):
+        fields = super().get_viewer_fields(owner_id)
+        user = self.request.user
+        fields['following_id'] = None
+        if user.is_authenticated and self.wants('following_id'):
+            fields['following_id'] = Follower.objects.filter(
+                owner=user, followed=owner_id
+            ).values_list('id', flat=True).first()
+        return fields